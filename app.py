@@ -5,13 +5,22 @@ Run with:
     streamlit run app.py
 """
 
+import time
+
+_import_start = time.perf_counter()
+
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 import streamlit as st
-from data_loader import load_companies, compute_aggregates
+import startup
+import tracing
+from config import DATA_BACKEND, STARTUP_MODE, TRACE_FILE
+
+# Only the app shell; data_cache (NumPy and the loaders) is imported as part of the data load
+startup.record("import", time.perf_counter() - _import_start)
 
 st.set_page_config(
     page_title="Portfolio Monitor",
@@ -20,31 +29,80 @@ st.set_page_config(
 )
 
 
-@st.cache_data
-def get_data():
-    companies = load_companies()
-    aggregates = compute_aggregates(companies)
-    return companies, aggregates
+# Navigation
+pages = [
+    st.Page("app_pages/portfolio_overview.py", title="Portfolio overview", icon=":material/dashboard:"),
+    st.Page("app_pages/geographic_footprint.py", title="Geographic footprint", icon=":material/map:"),
+    st.Page("app_pages/sector_view.py", title="Sectors", icon=":material/category:"),
+    st.Page("app_pages/country_view.py", title="Countries", icon=":material/public:"),
+    st.Page("app_pages/company_detail.py", title="Company detail", icon=":material/business:"),
+    st.Page("app_pages/impact_dashboard.py", title="Impact deep dive", icon=":material/diversity_3:"),
+    st.Page("app_pages/data_completeness.py", title="Data completeness", icon=":material/fact_check:"),
+]
+# Hidden unless opened with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1":
+    pages.append(st.Page("app_pages/diagnostics.py", title="Diagnostics", icon=":material/speed:"))
+page = st.navigation(pages, position="sidebar")
 
+# With the SQLite backend, these pages read everything they show from the
+# database (see sqlite_source.py), so the in-memory dataset isn't loaded for them
+SQLITE_PAGES = {"company_detail"}
+from_sqlite = DATA_BACKEND == "sqlite" and page.url_path in SQLITE_PAGES
 
-# Load data into session state
-companies, aggregates = get_data()
-st.session_state.setdefault("companies", companies)
-st.session_state.setdefault("aggregates", aggregates)
+# Load data into session state. The cache reloads changed data files, and
+# every rerun picks up the current version, including in existing sessions.
+# Only the funds being viewed are loaded. Session state only holds
+# references into the shared, read-only Dataset.
+with startup.timed("data_load"), st.spinner("Loading portfolio data…"):
+    from data_cache import default_cache
 
-# Navigation
-page = st.navigation(
-    [
-        st.Page("app_pages/portfolio_overview.py", title="Portfolio overview", icon=":material/dashboard:"),
-        st.Page("app_pages/geographic_footprint.py", title="Geographic footprint", icon=":material/map:"),
-        st.Page("app_pages/company_detail.py", title="Company detail", icon=":material/business:"),
-        st.Page("app_pages/impact_dashboard.py", title="Impact deep dive", icon=":material/diversity_3:"),
-    ],
-    position="sidebar",
-)
+    funds = default_cache().funds
+    if len(funds) > 1:
+        with st.sidebar:
+            selected_funds = st.multiselect("Funds", funds, default=funds[:1], key="funds") or funds[:1]
+    else:
+        selected_funds = funds
+    if from_sqlite:
+        from sqlite_source import default_source
+
+        source = default_source()
+        # Rebuilds the database if the data files or the ingest journal moved
+        source.refresh()
+        dataset = None
+    else:
+        dataset = default_cache().get(selected_funds)
+if STARTUP_MODE == "eager":
+    startup.preload()
+st.session_state.selected_funds = list(selected_funds)
+if dataset is not None:
+    previous = st.session_state.get("dataset")
+    if previous is not None and previous.funds == dataset.funds and previous.version != dataset.version:
+        st.toast("Portfolio data updated", icon=":material/sync:")
+    st.session_state.dataset = dataset
+    st.session_state.dataset_version = dataset.version
+    st.session_state.store = st.session_state.source = dataset.store
+    st.session_state.companies = dataset.store.companies
+    st.session_state.kpis = dataset.kpis
+    quarters = dataset.store.quarters[::-1]
+else:
+    # Drop references to a dataset an earlier page loaded, so no page mixes the two sources
+    for key in ("dataset", "dataset_version", "store", "companies", "kpis", "aggregates"):
+        st.session_state.pop(key, None)
+    st.session_state.source = source
+    quarters = source.quarters(selected_funds)[::-1]
+
+# As-of quarter shared by every page; defaults to the latest reported quarter
+latest_quarter = quarters[0] if quarters else None
+with st.sidebar:
+    as_of = st.selectbox("As of quarter", quarters, key="as_of")
+if dataset is not None:
+    st.session_state.aggregates = dataset.aggregates_at(as_of)
 
 # Shared sidebar content
 with st.sidebar:
-    st.caption("Prototype v0.1 · Q4 2025 data\nBuilt by ACG Digital Solutions")
+    st.caption(f"Prototype v0.1 · {latest_quarter} data\nBuilt by ACG Digital Solutions")
 
-page.run()
+with startup.timed("first_render"), tracing.span(f"page:{page.title}", "page"):
+    page.run()
+if TRACE_FILE and tracing.enabled():
+    tracing.write_trace(TRACE_FILE)
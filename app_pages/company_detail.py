@@ -2,32 +2,114 @@
 
 import streamlit as st
 from components.kpi_card import render_kpi_card
+from components.figure_cache import plotly_chart_cached
+from components.formatting import format_growth, format_number
 from components.charts import line_chart, donut_chart
-from config import COMPANY_COLORS, evaluate_status
+from config import company_color
+from data_loader import load_kpi_config
+from kpi_registry import KPIRegistry
+from search import search_index
+from timeseries import TimeSeriesCube, chart_values
 
 
-def format_number(n: float | int | None, currency: bool = False) -> str:
-    if n is None:
-        return "N/A"
-    prefix = "$" if currency else ""
-    if n >= 1_000_000:
-        return f"{prefix}{n / 1_000_000:.1f}M"
-    if n >= 1_000:
-        return f"{prefix}{n / 1_000:.1f}K"
-    return f"{prefix}{n:,.0f}"
+# Portfolios up to this size list every company in the selector; larger
+# ones search the index and list only the matches
+SELECT_ALL_MAX = 200
+SEARCH_LIMIT = 50
 
+source = st.session_state.source
+# None when the page is served from SQLite (DASHBOARD_DATA_BACKEND=sqlite)
+dataset = st.session_state.get("dataset")
+funds = st.session_state.selected_funds
+as_of = st.session_state.as_of
+dataset_store = dataset.store if dataset is not None else None
+n_companies = len(dataset_store) if dataset is not None else source.count(funds)
 
-companies = st.session_state.companies
 
-# Company selector
-company_names = [co.name for co in companies]
-selected_name = st.selectbox(
+def is_known(company_id: str) -> bool:
+    if dataset is not None:
+        return company_id in dataset_store.company_index
+    return source.position(company_id, funds) is not None
+
+
+def first_ids(limit: int | None) -> list[str]:
+    if dataset is not None:
+        return dataset_store.ids[:limit]
+    return list(source.company_names(funds=funds, limit=limit))
+
+
+def search_ids(query: str) -> list[str]:
+    if dataset is not None:
+        return search_index(dataset_store).search_ids(query, SEARCH_LIMIT)
+    return source.search_ids(query, SEARCH_LIMIT, funds)
+
+
+def company_names(ids: list[str]) -> dict[str, str]:
+    if dataset is not None:
+        return {i: dataset_store.meta["name"][dataset_store.company_index[i]] for i in ids}
+    return source.company_names(ids=ids)
+
+
+# Company selector; ?company=<id> deep-links to a company
+linked_id = st.query_params.get("company")
+if linked_id is not None and not is_known(linked_id):
+    st.warning(f"Unknown company “{linked_id}” in link.", icon=":material/link_off:")
+    linked_id = None
+
+if n_companies <= SELECT_ALL_MAX:
+    options = first_ids(None)
+else:
+    query = st.text_input(
+        "Search companies",
+        placeholder="Search by name, country, sector or description",
+        label_visibility="collapsed",
+    )
+    if query:
+        options = search_ids(query)
+        if not options:
+            st.caption(f"No companies match “{query}”.")
+    else:
+        options = first_ids(SEARCH_LIMIT)
+    if linked_id is not None and linked_id not in options:
+        options = [linked_id, *options]
+
+# A link opened fresh, or edited in the address bar, moves the selector
+if linked_id is not None and (
+    "company_select" not in st.session_state or linked_id != st.session_state.get("company_link")
+):
+    st.session_state.company_select = linked_id
+
+if not options:
+    # Nothing matched and no company is linked: show no company rather than an unrelated one
+    if not n_companies:
+        st.info("No portfolio companies yet.", icon=":material/hourglass_empty:")
+    st.stop()
+option_names = company_names(options)
+selected_id = st.selectbox(
     "Select company",
-    company_names,
+    options,
+    key="company_select",
+    format_func=option_names.__getitem__,
     label_visibility="collapsed",
 )
-company = next(co for co in companies if co.name == selected_name)
-accent = COMPANY_COLORS.get(company.id, "#00905D")
+# Keep the URL shareable
+st.query_params["company"] = st.session_state.company_link = selected_id
+
+# Only the selected company is pulled from the source. Everything below reads
+# from one place: the shared dataset, or for SQLite the company's own store.
+if dataset is not None:
+    store = dataset_store.select([selected_id])
+    axis = dataset_store  # quarter axis of the time-series cube
+    kpi_registry = dataset.kpis
+    timeseries = dataset.timeseries
+    position = dataset_store.position(selected_id)
+else:
+    store = axis = source.select([selected_id])
+    kpi_registry = KPIRegistry(store, load_kpi_config())
+    timeseries = TimeSeriesCube.from_store(store)
+    position = source.position(selected_id, funds)
+company = store.company(selected_id)
+accent = company_color(position)
 
 # Header
 st.title(company.name)
@@ -35,54 +117,9 @@ st.caption(f"{company.country} · {company.sector.value} · Founded {company.fou
 st.markdown(company.description)
 
 # KPIs
-latest = company.latest
+latest = store.snapshot(company.id, as_of)
 if latest:
-    imp = latest.impact
-    fin = latest.financial
-    ops = latest.operational
-
-    kpis = []
-
-    if imp.female_participation_pct is not None:
-        kpis.append(("Female participation", f"{imp.female_participation_pct:.0f}%",
-                      evaluate_status("female_participation_pct", imp.female_participation_pct)))
-    if imp.youth_participation_pct is not None:
-        kpis.append(("Youth participation", f"{imp.youth_participation_pct:.0f}%",
-                      evaluate_status("youth_participation_pct", imp.youth_participation_pct)))
-    if imp.income_improvement_pct is not None:
-        kpis.append(("Income improvement", f"{imp.income_improvement_pct:.0f}%",
-                      evaluate_status("income_improvement_pct", imp.income_improvement_pct)))
-    if ops.registered_users is not None:
-        kpis.append(("Registered users", format_number(ops.registered_users), "grey"))
-    if ops.active_users is not None:
-        kpis.append(("Active users", format_number(ops.active_users), "grey"))
-    if ops.acreage_managed is not None:
-        kpis.append(("Acreage managed", format_number(ops.acreage_managed), "grey"))
-    if ops.yield_increase_pct is not None:
-        kpis.append(("Yield increase", f"{ops.yield_increase_pct:.0f}%",
-                      evaluate_status("yield_increase_pct", ops.yield_increase_pct)))
-    if ops.protocol_adherence_pct is not None:
-        kpis.append(("Protocol adherence", f"{ops.protocol_adherence_pct:.0f}%",
-                      evaluate_status("protocol_adherence_pct", ops.protocol_adherence_pct)))
-    if ops.tonnes_exported is not None:
-        kpis.append(("Tonnes exported", format_number(ops.tonnes_exported), "grey"))
-    if ops.markets_served is not None:
-        kpis.append(("Markets served", str(ops.markets_served), "grey"))
-    if ops.spoilage_reduction_pct is not None:
-        kpis.append(("Spoilage reduction", f"{ops.spoilage_reduction_pct:.0f}%",
-                      evaluate_status("spoilage_reduction_pct", ops.spoilage_reduction_pct)))
-    if fin.default_rate_pct is not None:
-        kpis.append(("PAYG default rate", f"{fin.default_rate_pct:.1f}%",
-                      evaluate_status("default_rate_pct", fin.default_rate_pct)))
-    if fin.gross_margin_pct is not None:
-        kpis.append(("Gross margin", f">{fin.gross_margin_pct:.0f}%",
-                      evaluate_status("gross_margin_pct", fin.gross_margin_pct)))
-    if ops.daily_production_capacity is not None:
-        kpis.append(("Daily capacity", f"{ops.daily_production_capacity:,} units", "grey"))
-    if ops.locations is not None:
-        kpis.append(("Locations", str(ops.locations), "grey"))
-    if imp.direct_jobs is not None:
-        kpis.append(("Direct jobs", format_number(imp.direct_jobs), "grey"))
+    kpis = kpi_registry.rows("company_detail", company.id, as_of)
 
     st.subheader("Key performance indicators")
 
@@ -93,9 +130,10 @@ if latest:
             with cols[j]:
                 render_kpi_card(label, value, status)
 
-# Time-series
-if len(company.snapshots) > 1:
-    has_synthetic = any(s.is_synthetic for s in company.snapshots)
+# Time-series, read from the shared cube; unreported quarters show as gaps
+snapshots = store.snapshots(company.id, as_of)
+if len(snapshots) > 1:
+    has_synthetic = any(s.is_synthetic for s in snapshots)
     if has_synthetic:
         st.info(
             "Synthetic time-series for illustration. Connect your reporting pipeline to replace with actuals.",
@@ -103,27 +141,37 @@ if len(company.snapshots) > 1:
         )
 
     st.subheader("Trends")
-    quarters = [s.quarter for s in company.snapshots]
+    first = axis.quarter_index[snapshots[0].quarter]
+    quarters = axis.quarters[first:axis.quarter_position(as_of) + 1]
+
+    def trend(metric: str, kind: str = "value") -> list[float | None]:
+        return chart_values(timeseries.series(company.id, metric, kind, as_of)[first:])
+
+    def growth_caption(metric: str) -> None:
+        qoq, yoy = (timeseries.series(company.id, metric, kind, as_of)[-1] for kind in ("qoq", "yoy"))
+        st.caption(f"QoQ {format_growth(qoq)} · YoY {format_growth(yoy)}")
+
     col1, col2 = st.columns(2)
 
     with col1:
         with st.container(border=True):
-            if company.snapshots[0].operational.registered_users is not None:
-                series = {"Registered users": [s.operational.registered_users or 0 for s in company.snapshots]}
-                fig = line_chart(quarters, series, {list(series.keys())[0]: accent}, title="User growth")
-                st.plotly_chart(fig, use_container_width=True)
-            elif company.snapshots[0].operational.spoilage_reduction_pct is not None:
-                series = {"Spoilage reduction": [s.operational.spoilage_reduction_pct or 0 for s in company.snapshots]}
-                fig = line_chart(quarters, series, {list(series.keys())[0]: accent}, title="Spoilage reduction (%)", y_suffix="%")
-                st.plotly_chart(fig, use_container_width=True)
+            if snapshots[0].operational.registered_users is not None:
+                series = {"Registered users": trend("registered_users")}
+                plotly_chart_cached(line_chart, quarters, series, {list(series.keys())[0]: accent}, title="User growth")
+                growth_caption("registered_users")
+            elif snapshots[0].operational.spoilage_reduction_pct is not None:
+                series = {"Spoilage reduction": trend("spoilage_reduction_pct")}
+                plotly_chart_cached(line_chart, quarters, series, {list(series.keys())[0]: accent}, title="Spoilage reduction (%)", y_suffix="%")
 
     with col2:
         with st.container(border=True):
-            if company.snapshots[0].impact.female_participation_pct is not None:
-                series = {"Female %": [s.impact.female_participation_pct or 0 for s in company.snapshots]}
-                fig = line_chart(quarters, series, {list(series.keys())[0]: "#E879F9"}, title="Female participation (%)", y_suffix="%")
-                fig.update_layout(yaxis=dict(range=[0, 100]))
-                st.plotly_chart(fig, use_container_width=True)
+            if snapshots[0].impact.female_participation_pct is not None:
+                series = {"Female %": trend("female_participation_pct")}
+                plotly_chart_cached(
+                    line_chart, quarters, series, {list(series.keys())[0]: "#E879F9"},
+                    title="Female participation (%)", y_suffix="%",
+                    layout=dict(yaxis=dict(range=[0, 100])),
+                )
 else:
     with st.container(border=True):
         st.caption("Time-series data not yet available. Connect quarterly reporting pipeline to enable trend analysis.")
@@ -148,24 +196,24 @@ if latest:
                 with st.container(border=True):
                     if col_type == "gender":
                         male = 100 - imp.female_participation_pct
-                        fig = donut_chart(
+                        plotly_chart_cached(
+                            donut_chart,
                             ["Female", "Male"],
                             [imp.female_participation_pct, male],
                             [accent, "#4B5563"],
                             title="Gender split",
                             center_text=f"{imp.female_participation_pct:.0f}%",
                         )
-                        st.plotly_chart(fig, use_container_width=True)
                     elif col_type == "youth":
                         non_youth = 100 - imp.youth_participation_pct
-                        fig = donut_chart(
+                        plotly_chart_cached(
+                            donut_chart,
                             ["Youth (<30)", "Other"],
                             [imp.youth_participation_pct, non_youth],
                             ["#FBB500", "#4B5563"],
                             title="Youth split",
                             center_text=f"{imp.youth_participation_pct:.0f}%",
                         )
-                        st.plotly_chart(fig, use_container_width=True)
                     elif col_type == "jobs":
                         vals = [imp.direct_jobs]
                         labels = ["Direct jobs"]
@@ -174,12 +222,12 @@ if latest:
                             vals.append(imp.indirect_jobs)
                             labels.append("Indirect jobs")
                             colors.append("#4B5563")
-                        fig = donut_chart(
+                        plotly_chart_cached(
+                            donut_chart,
                             labels, vals, colors,
                             title="Employment",
                             center_text=format_number(sum(vals)),
                         )
-                        st.plotly_chart(fig, use_container_width=True)
 
 # Funding
 if latest and latest.financial.total_funding_usd:
@@ -0,0 +1,5 @@
+"""Country view: portfolio rollups by country, drilling down by sector."""
+
+from components.rollup_view import render_rollup_page
+
+render_rollup_page("country", drill="sector")
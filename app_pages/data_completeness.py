@@ -0,0 +1,88 @@
+"""Data completeness: reporting coverage per company, KPI block and quarter."""
+
+import numpy as np
+import streamlit as st
+from completeness import BLOCKS
+from components.figure_cache import plotly_chart_cached
+from components.charts import data_completeness_heatmap, line_chart
+from config import BRAND
+
+# Companies shown in the heatmap, least complete first
+HEATMAP_MAX_COMPANIES = 30
+
+BLOCK_LABELS = {"impact": "Impact", "financial": "Financial", "operational": "Operational"}
+BLOCK_COLORS = {"Impact": BRAND["green"], "Financial": BRAND["gold"], "Operational": BRAND["orange"]}
+
+
+store = st.session_state.store
+as_of = st.session_state.as_of
+completeness = st.session_state.dataset.completeness
+
+st.title("Data completeness")
+st.caption("Share of expected metrics reported: those any company in the same sector reports")
+
+# Quarters up to the as-of quarter; later ones are hidden like on every other page
+quarters = store.quarters[:store.quarter_position(as_of) + 1]
+if not quarters:
+    st.info("No quarterly data reported yet.", icon=":material/hourglass_empty:")
+    st.stop()
+
+quarter = st.selectbox("Quarter", quarters[::-1])
+coverage = completeness.quarter(quarter)
+overall = completeness.overall(quarter)
+reporting = ~np.isnan(overall)
+
+with st.container(horizontal=True):
+    st.metric(
+        "Overall",
+        f"{np.nanmean(overall):.0%}" if reporting.any() else "N/A",
+        help=f"{int(reporting.sum())} of {len(store)} companies had started reporting",
+        border=True,
+    )
+    trend = completeness.portfolio_trend()[:, store.quarter_index[quarter]]
+    for block, value in zip(BLOCKS, trend.tolist()):
+        st.metric(BLOCK_LABELS[block], "N/A" if np.isnan(value) else f"{value:.0%}", border=True)
+
+col_left, col_right = st.columns(2)
+
+with col_left:
+    with st.container(border=True):
+        rows = completeness.gaps(quarter, threshold=np.inf)[:HEATMAP_MAX_COMPANIES]
+        if len(rows):
+            plotly_chart_cached(
+                data_completeness_heatmap,
+                [store.meta["name"][i] for i in rows.tolist()],
+                [BLOCK_LABELS[b] for b in BLOCKS],
+                coverage[rows].tolist(),
+                layout=dict(height=60 + 28 * len(rows)),
+            )
+            if reporting.sum() > HEATMAP_MAX_COMPANIES:
+                st.caption(f"Least complete {HEATMAP_MAX_COMPANIES} of {int(reporting.sum())} reporting companies")
+
+with col_right:
+    with st.container(border=True):
+        history = completeness.portfolio_trend()[:, :len(quarters)]
+        series = {BLOCK_LABELS[b]: (values * 100).tolist() for b, values in zip(BLOCKS, history)}
+        plotly_chart_cached(line_chart, quarters, series, BLOCK_COLORS,
+                            title="Portfolio completeness by quarter", y_suffix="%",
+                            layout=dict(yaxis=dict(range=[0, 105])))
+
+# Companies with gaps
+st.subheader("Reporting gaps")
+gaps = completeness.gaps(quarter)
+if not len(gaps):
+    st.success(f"Every reporting company is complete for {quarter}.", icon=":material/task_alt:")
+else:
+    st.dataframe(
+        {
+            "Company": [store.meta["name"][i] for i in gaps.tolist()],
+            "Sector": [store.meta["sector"][i].value for i in gaps.tolist()],
+            "Overall": overall[gaps] * 100,
+            **{BLOCK_LABELS[b]: coverage[gaps, j] * 100 for j, b in enumerate(BLOCKS)},
+        },
+        column_config={
+            name: st.column_config.ProgressColumn(name, format="%.0f%%", min_value=0, max_value=100)
+            for name in ("Overall", *BLOCK_LABELS.values())
+        },
+        hide_index=True,
+    )
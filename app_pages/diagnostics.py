@@ -0,0 +1,119 @@
+"""Diagnostics: startup, cache, memory and profiling internals (hidden; open with ?diagnostics=1)."""
+
+import json
+
+import streamlit as st
+
+import tracing
+from components.figure_cache import FIGURE_CACHE
+from data_cache import default_cache
+from memory_report import active_session_states, dataset_footprint, session_overhead, shared_ids
+from startup import STARTUP
+
+stats = default_cache().stats
+
+st.title("Diagnostics")
+st.caption(f"Dataset version {st.session_state.dataset_version}")
+
+st.subheader("Startup")
+with st.container(horizontal=True):
+    for phase in ("import", "data_load", "preload", "first_render"):
+        if phase in STARTUP.phases:
+            st.metric(phase.replace("_", " ").capitalize(), f"{STARTUP.phases[phase] * 1000:,.0f} ms", border=True)
+    st.metric(
+        "Total",
+        f"{STARTUP.total_s * 1000:,.0f} ms",
+        help=f"Startup mode: {STARTUP.mode} · {len(STARTUP.first_render_modules)} modules imported by the first page",
+        border=True,
+    )
+
+st.subheader("Data cache")
+with st.container(horizontal=True):
+    st.metric("Cache hits", f"{stats.hits:,}", border=True)
+    st.metric("Cache misses", f"{stats.misses:,}", border=True)
+    st.metric(
+        "Last reload",
+        f"{stats.last_reload_s * 1000:,.0f} ms" if stats.last_reload_s is not None else "N/A",
+        help="Files: " + (", ".join(stats.last_reload_files) or "none"),
+        border=True,
+    )
+st.dataframe(
+    [{"file": name, "reloads": n} for name, n in stats.reloads.items()],
+    hide_index=True,
+)
+
+st.subheader("Figure cache")
+fig_stats = FIGURE_CACHE.stats
+with st.container(horizontal=True):
+    st.metric("Figure hits", f"{fig_stats.hits:,}", border=True)
+    st.metric("Figure misses", f"{fig_stats.misses:,}", border=True)
+    st.metric("Evictions", f"{fig_stats.evictions:,}", border=True)
+    st.metric(
+        "Cached figures",
+        f"{fig_stats.entries:,}",
+        help=f"{fig_stats.bytes / 1024:,.0f} KB of {FIGURE_CACHE.max_bytes / 1024 / 1024:,.0f} MB",
+        border=True,
+    )
+
+st.subheader("Memory")
+dataset = st.session_state.dataset
+footprint = dataset_footprint(dataset)
+shared = shared_ids(dataset, st.session_state.source)
+sessions = [
+    {"session": session_id, "overhead (KB)": round(session_overhead(state, shared) / 1024, 1)}
+    for session_id, state in active_session_states()
+]
+with st.container(horizontal=True):
+    st.metric(
+        "Shared dataset",
+        f"{footprint.total_bytes / 1024:,.0f} KB",
+        help=(
+            f"Arrays {footprint.array_bytes / 1024:,.0f} KB in memory, "
+            f"{footprint.mapped_bytes / 1024:,.0f} KB memory-mapped · "
+            f"{footprint.companies_materialized} companies and "
+            f"{footprint.snapshots_materialized} snapshots materialized"
+        ),
+        border=True,
+    )
+    st.metric("Active sessions", f"{len(sessions):,}", border=True)
+    st.metric(
+        "Per-session overhead",
+        f"{max(s['overhead (KB)'] for s in sessions):,.1f} KB",
+        help="Largest session; excludes references to the shared dataset",
+        border=True,
+    )
+st.dataframe(sessions, hide_index=True)
+
+st.subheader("Profiling")
+recording = st.toggle(
+    "Record timing spans",
+    value=tracing.enabled(),
+    help="Page runs, data access, KPI evaluation, chart builds and widgets, for every session in this process",
+)
+if recording != tracing.enabled():
+    tracing.set_enabled(recording)
+recorded = tracing.spans()
+pages_run = [s for s in recorded if s.category == "page"]
+with st.container(horizontal=True):
+    st.metric("Buffered spans", f"{len(recorded):,}", border=True)
+    st.metric("Page runs", f"{len(pages_run):,}", border=True)
+    if pages_run:
+        st.metric(
+            "Slowest page run",
+            f"{max(s.duration_ns for s in pages_run) / 1e6:,.0f} ms",
+            help=max(pages_run, key=lambda s: s.duration_ns).name,
+            border=True,
+        )
+st.dataframe(tracing.summarize(recorded), hide_index=True)
+with st.container(horizontal=True):
+    st.download_button(
+        "Download trace",
+        json.dumps(tracing.chrome_trace(recorded)),
+        file_name="dashboard-trace.json",
+        mime="application/json",
+        help="Chrome trace format; open in chrome://tracing, Perfetto or speedscope",
+        icon=":material/download:",
+    )
+    if st.button("Clear spans", icon=":material/delete:"):
+        tracing.clear()
+        st.rerun()
@@ -1,67 +1,83 @@
 """Geographic footprint: interactive map of portfolio company locations."""
 
+import numpy as np
 import streamlit as st
-from components.kpi_card import render_kpi_card
-from components.charts import africa_map
-from config import COMPANY_COLORS
+import geo
+from components.figure_cache import plotly_chart_cached
+from components.formatting import format_number
+from components.charts import africa_map, africa_cluster_map
+from config import company_color
 
-COUNTRY_COORDS = {
-    "Ghana": (7.95, -1.02),
-    "Nigeria": (9.08, 7.49),
-}
+# Companies listed per country card before the rest are summarized
+COUNTRY_LIST_MAX = 8
+COUNTRY_COLUMNS = 4
 
 
-def format_number(n: float | int | None, currency: bool = False) -> str:
-    if n is None:
-        return "N/A"
-    prefix = "$" if currency else ""
-    if n >= 1_000_000:
-        return f"{prefix}{n / 1_000_000:.1f}M"
-    if n >= 1_000:
-        return f"{prefix}{n / 1_000:.1f}K"
-    return f"{prefix}{n:,.0f}"
-
-
-companies = st.session_state.companies
+store = st.session_state.store
 aggregates = st.session_state.aggregates
+as_of = st.session_state.as_of
 
 st.title("Geographic footprint")
 st.caption(f"{aggregates['company_count']} portfolio companies across West Africa")
 
-# Build map data
-map_names, map_lats, map_lons, map_sizes, map_colors, map_hovers = [], [], [], [], [], []
-for co in companies:
-    lat, lon = COUNTRY_COORDS.get(co.country, (0, 0))
-    if co.country == "Nigeria":
-        offset = {"agroeknor": (-1.5, -2), "koolboks": (1.5, -1), "yikodeen": (-0.5, 2), "toasties": (1.0, 1.5)}
-        dx, dy = offset.get(co.id, (0, 0))
-        lat += dx
-        lon += dy
-
-    latest = co.latest
-    size = latest.impact.total_beneficiaries if latest and latest.impact.total_beneficiaries else 1000
-    map_names.append(co.name)
-    map_lats.append(lat)
-    map_lons.append(lon)
-    map_sizes.append(size)
-    map_colors.append(COMPANY_COLORS.get(co.id, "#00905D"))
-    map_hovers.append(f"<b>{co.name}</b><br>{co.country} | {co.sector.value}<br>Beneficiaries: {format_number(size)}")
+names = store.meta["name"]
+countries = store.meta["country"]
+lats, lons = geo.company_positions(store)
+beneficiaries = store.latest("total_beneficiaries", as_of)
+located = np.flatnonzero(~np.isnan(lats))
+if len(located) < len(store):
+    st.caption(f"{len(store) - len(located)} companies in countries without map coordinates are not shown.")
 
-fig = africa_map(map_names, map_lats, map_lons, map_sizes, map_colors, map_hovers)
-fig.update_layout(height=600)
-st.plotly_chart(fig, use_container_width=True)
+if len(located) <= geo.DETAIL_MAX_POINTS:
+    # Few enough companies to label each one
+    sizes = np.where(np.nan_to_num(beneficiaries) > 0, beneficiaries, 1000).tolist()
+    sectors = store.meta["sector"]
+    plotly_chart_cached(
+        africa_map,
+        [names[i] for i in located],
+        lats[located].tolist(),
+        lons[located].tolist(),
+        [sizes[i] for i in located],
+        [company_color(i) for i in located],
+        [f"<b>{names[i]}</b><br>{countries[i]} | {sectors[i].value}<br>Beneficiaries: {format_number(sizes[i])}"
+         for i in located],
+        layout=dict(height=600),
+    )
+else:
+    zoom = st.slider(
+        "Map detail", 0, geo.MAX_ZOOM, geo.auto_zoom(lats, lons),
+        help="Companies are grouped into grid cells; higher detail uses smaller cells",
+    )
+    clusters = geo.cluster(lats, lons, beneficiaries, zoom)
+    plotly_chart_cached(
+        africa_cluster_map,
+        clusters.lats.tolist(),
+        clusters.lons.tolist(),
+        clusters.counts.tolist(),
+        clusters.beneficiaries.tolist(),
+        [names[f] if n == 1 else f"{n:,} companies" for f, n in zip(clusters.first.tolist(), clusters.counts.tolist())],
+        layout=dict(height=600),
+    )
 
-# Country summary below the map
-countries = {}
-for co in companies:
-    countries.setdefault(co.country, []).append(co)
+# Country summary below the map, in order of first appearance
+country_names, first_row, country_idx = np.unique(
+    np.asarray(countries, dtype=object), return_index=True, return_inverse=True,
+)
+country_order = np.argsort(first_row)
+country_totals = np.bincount(country_idx, np.nan_to_num(beneficiaries), minlength=len(country_names))
 
-cols = st.columns(len(countries))
-for i, (country, cos) in enumerate(countries.items()):
-    with cols[i]:
-        with st.container(border=True):
-            st.subheader(f":material/location_on: {country}")
-            for co in cos:
-                latest = co.latest
-                beneficiaries = format_number(latest.impact.total_beneficiaries) if latest and latest.impact.total_beneficiaries else "N/A"
-                st.markdown(f"**{co.name}** · {co.sector.value}  \n{beneficiaries} beneficiaries")
+for row_start in range(0, len(country_order), COUNTRY_COLUMNS):
+    row = country_order[row_start:row_start + COUNTRY_COLUMNS]
+    cols = st.columns(len(row))
+    for col, c in zip(cols, row):
+        members = np.flatnonzero(country_idx == c)
+        with col:
+            with st.container(border=True):
+                st.subheader(f":material/location_on: {country_names[c]}")
+                if len(members) > COUNTRY_LIST_MAX:
+                    st.caption(f"{len(members):,} companies · {format_number(country_totals[c])} beneficiaries")
+                    members = members[np.argsort(-np.nan_to_num(beneficiaries[members]), kind="stable")][:COUNTRY_LIST_MAX]
+                for i in members:
+                    b = beneficiaries[i]
+                    shown = format_number(b) if not np.isnan(b) and b else "N/A"
+                    st.markdown(f"**{names[i]}** · {store.meta['sector'][i].value}  \n{shown} beneficiaries")
@@ -1,40 +1,21 @@
 """Impact deep dive: cross-portfolio impact analysis."""
 
+import numpy as np
 import streamlit as st
-from components.charts import radar_chart, grouped_bar
-from config import COMPANY_COLORS
-
-
-SDG_MAP = {
-    "Complete Farmer": {"SDG 1": True, "SDG 2": True, "SDG 5": True, "SDG 8": True, "SDG 9": True, "SDG 12": False, "SDG 13": False},
-    "AgroEknor": {"SDG 1": True, "SDG 2": True, "SDG 5": True, "SDG 8": True, "SDG 9": True, "SDG 12": True, "SDG 13": False},
-    "Koolboks": {"SDG 1": True, "SDG 2": True, "SDG 5": True, "SDG 8": True, "SDG 9": True, "SDG 12": True, "SDG 13": True},
-    "Yikodeen": {"SDG 1": False, "SDG 2": False, "SDG 5": True, "SDG 8": True, "SDG 9": True, "SDG 12": True, "SDG 13": False},
-    "Toasties": {"SDG 1": False, "SDG 2": False, "SDG 5": True, "SDG 8": True, "SDG 9": False, "SDG 12": True, "SDG 13": False},
-}
-
-SDG_LABELS = {
-    "SDG 1": "No Poverty",
-    "SDG 2": "Zero Hunger",
-    "SDG 5": "Gender Equality",
-    "SDG 8": "Decent Work",
-    "SDG 9": "Industry & Innovation",
-    "SDG 12": "Responsible Consumption",
-    "SDG 13": "Climate Action",
-}
-
-
-def format_number(n: float | int | None) -> str:
-    if n is None:
-        return "N/A"
-    if n >= 1_000_000:
-        return f"{n / 1_000_000:.1f}M"
-    if n >= 1_000:
-        return f"{n / 1_000:.1f}K"
-    return f"{n:,.0f}"
+import sdg
+from components.figure_cache import plotly_chart_cached
+from components.formatting import format_number
+from components.charts import radar_chart, grouped_bar, horizontal_bar, sdg_matrix
+from config import BRAND, company_color
 
 
+# Most companies the SDG matrix lists; larger selections show the top by beneficiaries
+SDG_MATRIX_MAX = 40
+
+
+store = st.session_state.store
 companies = st.session_state.companies
+as_of = st.session_state.as_of
 
 st.title("Impact deep dive")
 st.caption("Gender, youth, and employment across the portfolio")
@@ -44,8 +25,8 @@ total_women_reached = 0
 total_youth_reached = 0
 total_lives = 0
 
-for co in companies:
-    latest = co.latest
+for i, co in enumerate(companies):
+    latest = store.snapshot(i, as_of)
     if not latest:
         continue
     imp = latest.impact
@@ -69,8 +50,8 @@ with st.container(border=True):
     company_data = {}
     radar_colors = {}
 
-    for co in companies:
-        latest = co.latest
+    for i, co in enumerate(companies):
+        latest = store.snapshot(i, as_of)
         if not latest:
             continue
         imp = latest.impact
@@ -83,10 +64,9 @@ with st.container(border=True):
         geo = min((ops.countries_operating or (ops.markets_served or 1)) / 28 * 100, 100)
 
         company_data[co.name] = [female, youth, income, jobs, geo]
-        radar_colors[co.name] = COMPANY_COLORS.get(co.id, "#00905D")
+        radar_colors[co.name] = company_color(i)
 
-    fig = radar_chart(categories, company_data, radar_colors)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart_cached(radar_chart, categories, company_data, radar_colors)
 
 # Comparative bars
 col1, col2 = st.columns(2)
@@ -95,50 +75,79 @@ with col1:
     with st.container(border=True):
         names = []
         groups = {"Female %": []}
-        for co in companies:
-            latest = co.latest
+        for i, co in enumerate(companies):
+            latest = store.snapshot(i, as_of)
             if latest and latest.impact.female_participation_pct is not None:
                 names.append(co.name)
                 groups["Female %"].append(latest.impact.female_participation_pct)
         if names:
-            fig = grouped_bar(names, groups, {"Female %": "#E879F9"}, title="Female participation", y_suffix="%")
-            fig.update_layout(yaxis=dict(range=[0, 100]), showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart_cached(
+                grouped_bar, names, groups, {"Female %": "#E879F9"},
+                title="Female participation", y_suffix="%",
+                layout=dict(yaxis=dict(range=[0, 100]), showlegend=False),
+            )
 
 with col2:
     with st.container(border=True):
         names = []
         groups = {"Income uplift %": []}
-        for co in companies:
-            latest = co.latest
+        for i, co in enumerate(companies):
+            latest = store.snapshot(i, as_of)
             if latest and latest.impact.income_improvement_pct is not None:
                 names.append(co.name)
                 groups["Income uplift %"].append(latest.impact.income_improvement_pct)
         if names:
-            fig = grouped_bar(names, groups, {"Income uplift %": "#FBB500"}, title="Income improvement", y_suffix="%")
-            fig.update_layout(showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart_cached(
+                grouped_bar, names, groups, {"Income uplift %": "#FBB500"},
+                title="Income improvement", y_suffix="%",
+                layout=dict(showlegend=False),
+            )
 
-# SDG alignment
+# SDG alignment: one figure for the matrix, one for per-goal totals
 st.subheader("SDG alignment")
-sdg_keys = list(SDG_LABELS.keys())
+masks = store.sdg_mask
+goals = sdg.goals_of(int(np.bitwise_or.reduce(masks))) if len(masks) else []
 
-with st.container(border=True):
-    header_cols = st.columns([2] + [1] * len(sdg_keys))
-    with header_cols[0]:
-        st.caption("**Company**")
-    for i, sdg in enumerate(sdg_keys):
-        with header_cols[i + 1]:
-            st.caption(f"{sdg}")
-
-    for co in companies:
-        row_cols = st.columns([2] + [1] * len(sdg_keys))
-        sdg_data = SDG_MAP.get(co.name, {})
-        with row_cols[0]:
-            st.markdown(co.name)
-        for i, sdg in enumerate(sdg_keys):
-            with row_cols[i + 1]:
-                if sdg_data.get(sdg, False):
-                    st.badge("Y", color="green")
-                else:
-                    st.badge("-", color="gray")
+if goals:
+    goal_cols = [g - 1 for g in goals]
+    beneficiaries = np.nan_to_num(store.latest("total_beneficiaries", as_of))
+
+    with st.container(border=True):
+        with st.container(horizontal=True, vertical_alignment="bottom"):
+            selected = st.multiselect(
+                "Aligned with",
+                goals,
+                format_func=lambda g: f"SDG {g} · {sdg.SDG_NAMES[g]}",
+                placeholder="All companies",
+            )
+            match = st.segmented_control("Match", ["All", "Any"], default="All")
+        if not selected:
+            rows = np.arange(len(store))
+        elif match == "Any":
+            rows = sdg.aligned(masks, any_of=selected)
+        else:
+            rows = sdg.aligned(masks, all_of=selected)
+        if selected:
+            noun = "company" if len(rows) == 1 else "companies"
+            st.caption(f"{len(rows):,} {noun} · {format_number(beneficiaries[rows].sum())} beneficiaries")
+        if len(rows) > SDG_MATRIX_MAX:
+            st.caption(f"Showing the {SDG_MATRIX_MAX} companies with the most beneficiaries.")
+            rows = np.sort(rows[np.argsort(-beneficiaries[rows], kind="stable")[:SDG_MATRIX_MAX]])
+        if len(rows):
+            plotly_chart_cached(
+                sdg_matrix,
+                [store.meta["name"][i] for i in rows.tolist()],
+                [f"SDG {g}" for g in goals],
+                sdg.membership(masks[rows])[:, goal_cols].astype(int).tolist(),
+            )
+
+    with st.container(border=True):
+        counts = sdg.goal_counts(masks)[goal_cols]
+        reached = sdg.goal_counts(masks, beneficiaries)[goal_cols]
+        plotly_chart_cached(
+            horizontal_bar,
+            [f"SDG {g} · {sdg.SDG_NAMES[g]} ({n:,})" for g, n in zip(goals, counts.tolist())],
+            reached.tolist(),
+            [BRAND["green"]] * len(goals),
+            title="Beneficiaries by SDG (companies aligned)",
+        )
@@ -1,27 +1,38 @@
 """Portfolio overview: all companies at a glance."""
 
+import numpy as np
 import streamlit as st
-from components.kpi_card import render_kpi_card, render_company_scorecard
-from components.charts import horizontal_bar
-from config import COMPANY_COLORS, evaluate_status
-
-def format_number(n: float | int | None, currency: bool = False) -> str:
-    if n is None:
-        return "N/A"
-    prefix = "$" if currency else ""
-    if n >= 1_000_000:
-        return f"{prefix}{n / 1_000_000:.1f}M"
-    if n >= 1_000:
-        return f"{prefix}{n / 1_000:.1f}K"
-    return f"{prefix}{n:,.0f}"
-
-
-companies = st.session_state.companies
+from components.kpi_card import STATUS_BADGE_MAP, render_company_scorecard
+from components.figure_cache import plotly_chart_cached
+from components.formatting import format_growth, format_number
+from components.charts import horizontal_bar, line_chart
+from config import BRAND, STATUS_CODES, company_color
+from timeseries import ROLLING_WINDOW, chart_values
+
+PAGE_SIZE = 15
+CARDS_PER_ROW = 5
+SCORECARD_KPIS = 4
+CHART_MAX_COMPANIES = 20
+
+# Sort key -> metric sorted descending; None keeps portfolio order
+SORT_OPTIONS = {
+    "Portfolio order": None,
+    "Name": "name",
+    "Beneficiaries": "total_beneficiaries",
+    "Direct jobs": "direct_jobs",
+    "Funding": "total_funding_usd",
+    "Status": "status",
+}
+
+
+store = st.session_state.store
 aggregates = st.session_state.aggregates
+kpi_registry = st.session_state.kpis
+as_of = st.session_state.as_of
 
 # Header
 st.title("Portfolio overview")
-st.caption(f"Last updated Q4 2025 · {aggregates['company_count']} portfolio companies")
+st.caption(f"As of {as_of} · {aggregates['company_count']} portfolio companies")
 
 # Aggregate KPIs
 with st.container(horizontal=True):
@@ -50,112 +61,144 @@ with st.container(horizontal=True):
         border=True,
     )
 
-# Company scorecards
+# Company scorecards: filtered, sorted and paged server-side, so only the
+# visible page of cards is built. Card rows come from the KPI registry cache.
 st.subheader("Portfolio companies")
-card_cols = st.columns(len(companies))
-
-for i, co in enumerate(companies):
-    latest = co.latest
-    if not latest:
-        continue
-
-    imp = latest.impact
-    fin = latest.financial
-    ops = latest.operational
-
-    kpis = []
-    if imp.female_participation_pct is not None:
-        kpis.append((
-            "Female %",
-            f"{imp.female_participation_pct:.0f}%",
-            evaluate_status("female_participation_pct", imp.female_participation_pct),
-        ))
-    if imp.total_beneficiaries is not None:
-        kpis.append(("Beneficiaries", format_number(imp.total_beneficiaries), "grey"))
-    if imp.income_improvement_pct is not None:
-        kpis.append((
-            "Income uplift",
-            f"{imp.income_improvement_pct:.0f}%",
-            evaluate_status("income_improvement_pct", imp.income_improvement_pct),
-        ))
-    if ops.yield_increase_pct is not None:
-        kpis.append((
-            "Yield increase",
-            f"{ops.yield_increase_pct:.0f}%",
-            evaluate_status("yield_increase_pct", ops.yield_increase_pct),
-        ))
-    if fin.gross_margin_pct is not None:
-        kpis.append((
-            "Gross margin",
-            f"{fin.gross_margin_pct:.0f}%",
-            evaluate_status("gross_margin_pct", fin.gross_margin_pct),
-        ))
-    if fin.default_rate_pct is not None:
-        kpis.append((
-            "Default rate",
-            f"{fin.default_rate_pct:.1f}%",
-            evaluate_status("default_rate_pct", fin.default_rate_pct),
-        ))
-    if ops.spoilage_reduction_pct is not None:
-        kpis.append((
-            "Spoilage reduction",
-            f"{ops.spoilage_reduction_pct:.0f}%",
-            evaluate_status("spoilage_reduction_pct", ops.spoilage_reduction_pct),
-        ))
-    if ops.daily_production_capacity is not None and ops.daily_production_target:
-        utilization = ops.daily_production_capacity / ops.daily_production_target * 100
-        kpis.append((
-            "Capacity utilization",
-            f"{utilization:.0f}%",
-            "yellow" if utilization < 50 else "green",
-        ))
-    if imp.youth_participation_pct is not None:
-        kpis.append((
-            "Youth %",
-            f"{imp.youth_participation_pct:.0f}%",
-            evaluate_status("youth_participation_pct", imp.youth_participation_pct),
-        ))
-
-    kpis = kpis[:4]
-
-    with card_cols[i]:
-        render_company_scorecard(
-            name=co.name,
-            country=co.country,
-            sector=co.sector.value,
-            kpis=kpis,
-        )
+
+names = np.asarray(store.meta["name"], dtype=object)
+sectors = np.asarray([s.value for s in store.meta["sector"]], dtype=object)
+countries = np.asarray(store.meta["country"], dtype=object)
+status = kpi_registry.worst_status("scorecard", as_of, SCORECARD_KPIS)
+status_labels = {STATUS_BADGE_MAP[name][0]: code for code, name in enumerate(STATUS_CODES)}
+
+
+def _first_page():
+    st.session_state.scorecard_page = 0
+
+
+with st.container(horizontal=True):
+    sector_filter = st.multiselect("Sector", sorted(set(sectors)), placeholder="All sectors", on_change=_first_page)
+    country_filter = st.multiselect("Country", sorted(set(countries)), placeholder="All countries", on_change=_first_page)
+    status_filter = st.multiselect("Status", list(status_labels), placeholder="Any status", on_change=_first_page,
+                                   help="Worst status among the KPIs on each card")
+    sort_by = st.selectbox("Sort by", list(SORT_OPTIONS), on_change=_first_page)
+
+visible = store.as_of_idx(as_of) >= 0
+if sector_filter:
+    visible &= np.isin(sectors, sector_filter)
+if country_filter:
+    visible &= np.isin(countries, country_filter)
+if status_filter:
+    visible &= np.isin(status, [status_labels[s] for s in status_filter])
+rows = np.flatnonzero(visible)
+
+sort_key = SORT_OPTIONS[sort_by]
+if sort_key == "name":
+    rows = rows[np.argsort(names[rows], kind="stable")]
+elif sort_key == "status":
+    rows = rows[np.argsort(-status[rows], kind="stable")]
+elif sort_key is not None:
+    values = store.latest(sort_key, as_of)[rows]
+    rows = rows[np.argsort(-np.nan_to_num(values, nan=-np.inf), kind="stable")]
+
+n_pages = max(1, -(-len(rows) // PAGE_SIZE))
+page = min(st.session_state.get("scorecard_page", 0), n_pages - 1)
+page_rows = rows[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+
+for row_start in range(0, len(page_rows), CARDS_PER_ROW):
+    card_cols = st.columns(CARDS_PER_ROW if len(rows) > CARDS_PER_ROW else max(len(page_rows), 1))
+    for col, i in zip(card_cols, page_rows[row_start:row_start + CARDS_PER_ROW].tolist()):
+        with col:
+            render_company_scorecard(
+                name=names[i],
+                country=countries[i],
+                sector=sectors[i],
+                kpis=kpi_registry.rows("scorecard", i, as_of)[:SCORECARD_KPIS],
+            )
+if not len(rows):
+    st.info("No companies match these filters.", icon=":material/filter_alt_off:")
+
+
+def _turn_page(step: int):
+    st.session_state.scorecard_page = page + step
+
+
+if n_pages > 1:
+    with st.container(horizontal=True, vertical_alignment="center"):
+        st.button("Previous", icon=":material/chevron_left:", disabled=page == 0,
+                  on_click=_turn_page, args=(-1,))
+        st.caption(f"Page {page + 1} of {n_pages} · {len(rows):,} companies")
+        st.button("Next", icon=":material/chevron_right:", disabled=page == n_pages - 1,
+                  on_click=_turn_page, args=(1,))
+
+
+def _chart_rows(metric: str, require_positive: bool) -> tuple[np.ndarray, bool]:
+    """Companies with a value for the metric, capped to the largest CHART_MAX_COMPANIES.
+
+    Also returns whether the cap applied.
+    """
+    values = store.latest(metric, as_of)
+    present = ~np.isnan(values) & ((values != 0) if require_positive else True)
+    chart_rows = np.flatnonzero(present)
+    if len(chart_rows) > CHART_MAX_COMPANIES:
+        top = np.argsort(-values[chart_rows], kind="stable")[:CHART_MAX_COMPANIES]
+        return np.sort(chart_rows[top]), True
+    return chart_rows, False
+
+
+def _colors(chart_rows: np.ndarray) -> list[str]:
+    return [company_color(i) for i in chart_rows.tolist()]
+
 
 # Charts
 col_left, col_right = st.columns(2)
 
 with col_left:
     with st.container(border=True):
-        names, vals, colors = [], [], []
-        for co in companies:
-            latest = co.latest
-            if latest and latest.impact.total_beneficiaries:
-                names.append(co.name)
-                vals.append(latest.impact.total_beneficiaries)
-                colors.append(COMPANY_COLORS.get(co.id, "#00905D"))
-        if names:
-            fig = horizontal_bar(names, vals, colors, title="Total beneficiaries by company")
-            st.plotly_chart(fig, use_container_width=True)
+        chart_rows, capped = _chart_rows("total_beneficiaries", require_positive=True)
+        if len(chart_rows):
+            plotly_chart_cached(
+                horizontal_bar,
+                names[chart_rows].tolist(),
+                store.latest("total_beneficiaries", as_of)[chart_rows].tolist(),
+                _colors(chart_rows),
+                title=(f"Total beneficiaries: top {CHART_MAX_COMPANIES} companies" if capped
+                       else "Total beneficiaries by company"),
+            )
 
 with col_right:
     with st.container(border=True):
-        names, female_vals, colors_list = [], [], []
-        for co in companies:
-            latest = co.latest
-            if latest and latest.impact.female_participation_pct is not None:
-                names.append(co.name)
-                female_vals.append(latest.impact.female_participation_pct)
-                colors_list.append(COMPANY_COLORS.get(co.id, "#00905D"))
-        if names:
-            fig = horizontal_bar(
-                names, female_vals, colors_list,
-                title="Female participation by company",
+        chart_rows, capped = _chart_rows("female_participation_pct", require_positive=False)
+        if len(chart_rows):
+            plotly_chart_cached(
+                horizontal_bar,
+                names[chart_rows].tolist(),
+                store.latest("female_participation_pct", as_of)[chart_rows].tolist(),
+                _colors(chart_rows),
+                title=(f"Female participation: top {CHART_MAX_COMPANIES} companies" if capped
+                       else "Female participation by company"),
                 value_suffix="%",
+                layout=dict(xaxis=dict(range=[0, 100])),
             )
-            fig.update_layout(xaxis=dict(range=[0, 100]))
-            st.plotly_chart(fig, use_container_width=True)
+
+# Portfolio trends from the shared time-series cube. Growth is like-for-like:
+# only companies that reported in both quarters are compared.
+trend_quarters = store.quarters[:store.quarter_position(as_of) + 1]
+if len(trend_quarters) > 1:
+    st.subheader("Portfolio trends")
+    timeseries = st.session_state.dataset.timeseries
+    col_left, col_right = st.columns(2)
+    for col, metric, label, color in (
+        (col_left, "total_beneficiaries", "Total beneficiaries", BRAND["green"]),
+        (col_right, "direct_jobs", "Direct jobs", BRAND["orange"]),
+    ):
+        with col:
+            with st.container(border=True):
+                series = {
+                    label: chart_values(timeseries.portfolio_series(metric, "total", as_of)),
+                    f"{ROLLING_WINDOW}-quarter average": chart_values(timeseries.portfolio_series(metric, "rolling", as_of)),
+                }
+                plotly_chart_cached(line_chart, trend_quarters, series,
+                                    {label: color, f"{ROLLING_WINDOW}-quarter average": "#6B7280"}, title=label)
+                qoq, yoy = (timeseries.portfolio_series(metric, kind, as_of)[-1] for kind in ("qoq", "yoy"))
+                st.caption(f"QoQ {format_growth(qoq)} · YoY {format_growth(yoy)} · like-for-like")
@@ -0,0 +1,5 @@
+"""Sector view: portfolio rollups by sector, drilling down by country."""
+
+from components.rollup_view import render_rollup_page
+
+render_rollup_page("sector", drill="country")
@@ -0,0 +1,155 @@
+"""Generate synthetic portfolio files shaped like data/portfolio_companies.json.
+
+Each generated company copies the reporting profile of one of the real
+companies: its sector, SDG alignment, which metrics it reports and their
+rough magnitude.
+Values are rescaled per company and grow quarter on quarter. On top of that, single
+metrics go missing at a per-block rate, companies start reporting at
+different quarters, and a few quarters are skipped, so null patterns look
+like real reporting. Output is written one company at a time, so 100k × 80
+files never sit in memory.
+
+    python benchmarks/generate.py --companies 1000 --quarters 8 --out /tmp/portfolio-1k
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DATA_DIR
+from models import format_quarter, parse_quarter
+from store import INT_METRICS, METRIC_BLOCKS, METRIC_BLOCK, METRICS
+
+LAST_QUARTER = "Q4 2025"
+
+# Chance a metric the profile reports is still missing from one snapshot
+BLOCK_NULL_RATE = {"impact": 0.05, "financial": 0.15, "operational": 0.10}
+LATE_START_RATE = 0.3   # companies that joined the portfolio after the first quarter
+SKIPPED_QUARTER_RATE = 0.03
+
+COUNTRIES = ["Nigeria", "Ghana", "Kenya", "Senegal", "Côte d'Ivoire", "Rwanda", "Uganda", "Tanzania"]
+COUNTRY_WEIGHTS = [0.35, 0.2, 0.15, 0.08, 0.08, 0.05, 0.05, 0.04]
+FUNDS = ["Acumen / Alitheia / Goodwell", "Alitheia IDF", "Goodwell Africa", "Acumen Resilient Agriculture"]
+
+
+def load_profiles(path: Path) -> list[tuple[str, list[int], dict[str, float]]]:
+    """Per real company, its sector, SDGs and the latest value of each metric it reports."""
+    companies = json.loads(path.read_text(encoding="utf-8"))["companies"]
+    profiles = []
+    for c in companies:
+        profile = {}
+        for s in c["snapshots"]:
+            for block in METRIC_BLOCKS:
+                for key, value in (s.get(block) or {}).items():
+                    if value is not None and METRIC_BLOCK.get(key) == block:
+                        profile[key] = value
+        profiles.append((c["sector"], c.get("sdgs", []), profile))
+    return profiles
+
+
+def _company_record(i: int, rng: np.random.Generator, sector: str, sdgs: list[int],
+                    profile: dict[str, float], quarter_keys: np.ndarray) -> dict:
+    country = rng.choice(COUNTRIES, p=COUNTRY_WEIGHTS)
+    scale = rng.lognormal(0.0, 0.8)
+    growth = rng.normal(0.06, 0.04)
+
+    start = 0
+    if len(quarter_keys) > 1 and rng.random() < LATE_START_RATE:
+        start = int(rng.integers(1, len(quarter_keys)))
+
+    snapshots = []
+    for q in range(start, len(quarter_keys)):
+        if q < len(quarter_keys) - 1 and rng.random() < SKIPPED_QUARTER_RATE:
+            continue
+        age = len(quarter_keys) - 1 - q  # quarters before the latest
+        snapshot = {
+            "quarter": format_quarter(int(quarter_keys[q])),
+            "is_synthetic": True,
+            **{block: {} for block in METRIC_BLOCKS},
+        }
+        for key in METRICS:
+            block = METRIC_BLOCK[key]
+            value = None
+            if key in profile and rng.random() >= BLOCK_NULL_RATE[block]:
+                if key.endswith("_pct"):
+                    value = float(np.clip(profile[key] + rng.normal(0, 5) - age * 0.5, 0, 100))
+                    value = round(value, 1)
+                else:
+                    value = profile[key] * scale * (1 + growth) ** -age * rng.normal(1, 0.03)
+                    value = max(value, 0.0)
+                    value = int(round(value)) if key in INT_METRICS else round(value, 2)
+            snapshot[block][key] = value
+        snapshots.append(snapshot)
+
+    return {
+        "id": f"company-{i:06d}",
+        "name": f"Company {i:06d}",
+        "country": str(country),
+        "sector": sector,
+        "iv_name": str(rng.choice(FUNDS)),
+        "founded_year": int(rng.integers(2005, 2023)),
+        "description": f"Synthetic {country} portfolio company for benchmarking.",
+        "sdgs": sdgs,
+        "snapshots": snapshots,
+    }
+
+
+def generate(out_dir: Path, companies: int, quarters: int, seed: int = 0,
+             source_dir: Path = DATA_DIR, funds: int = 1) -> Path:
+    """Write a synthetic data directory (companies JSON plus KPI targets) and return it.
+
+    With several funds, companies are dealt round-robin into one partition
+    file per fund under ``funds/``, listed in a manifest (see partitions.py).
+    """
+    rng = np.random.default_rng(seed)
+    profiles = load_profiles(source_dir / "portfolio_companies.json")
+    last = parse_quarter(LAST_QUARTER)
+    quarter_keys = np.arange(last - quarters + 1, last + 1)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source_dir / "kpi_targets.json", out_dir / "kpi_targets.json")
+    if funds == 1:
+        paths = [out_dir / "portfolio_companies.json"]
+    else:
+        (out_dir / "funds").mkdir(exist_ok=True)
+        names = [f"Fund {k + 1}" for k in range(funds)]
+        paths = [out_dir / "funds" / f"fund-{k + 1}.json" for k in range(funds)]
+        manifest = {"funds": [{"name": n, "path": f"funds/{p.name}"} for n, p in zip(names, paths)]}
+        (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+    files = [path.open("w", encoding="utf-8") for path in paths]
+    try:
+        for f in files:
+            f.write('{"companies": [\n')
+        for i in range(companies):
+            record = _company_record(i, rng, *profiles[i % len(profiles)], quarter_keys)
+            f = files[i % funds]
+            f.write((",\n" if i >= funds else "") + json.dumps(record))
+        for f in files:
+            f.write("\n]}\n")
+    finally:
+        for f in files:
+            f.close()
+    return out_dir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--quarters", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--funds", type=int, default=1, help="split companies into this many fund partitions")
+    parser.add_argument("--out", type=Path, required=True, help="output data directory")
+    args = parser.parse_args()
+    out = generate(args.out, args.companies, args.quarters, args.seed, funds=args.funds)
+    print(f"Wrote {args.companies} companies × {args.quarters} quarters to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time each page script against one data directory and print the results as JSON.
+
+Run by benchmarks/run.py in a fresh interpreter per data size, since the data
+directory is read from DASHBOARD_DATA_DIR when config is first imported.
+"Cold" is a page's first render in the process, with empty caches; "warm" is the
+median of the reruns after it.
+
+    DASHBOARD_DATA_DIR=/tmp/portfolio-1k python benchmarks/pages.py --repeat 3
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = [
+    "app_pages/portfolio_overview.py",
+    "app_pages/geographic_footprint.py",
+    "app_pages/sector_view.py",
+    "app_pages/country_view.py",
+    "app_pages/company_detail.py",
+    "app_pages/impact_dashboard.py",
+    "app_pages/data_completeness.py",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    results = []
+    start = time.perf_counter()
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=args.timeout).run()
+    results.append({"name": "page:app_startup", "runs": [time.perf_counter() - start]})
+
+    for page in PAGES:
+        runs = []
+        for _ in range(args.repeat + 1):
+            start = time.perf_counter()
+            at.switch_page(page).run()
+            runs.append(time.perf_counter() - start)
+        if at.exception:
+            raise SystemExit(f"{page}: {at.exception[0].value}")
+        name = Path(page).stem
+        results.append({"name": f"page:{name}:cold", "runs": runs[:1]})
+        results.append({"name": f"page:{name}:warm", "runs": runs[1:]})
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark load, aggregate, status, chart and page paths across portfolio sizes.
+
+For each size (companies × quarters) a synthetic data directory is generated
+once (see generate.py) into benchmarks/.data/ and reused by later runs. Results
+are written to benchmarks/results/<timestamp>-<commit>.json. Pass --compare with
+an earlier results file to print ratios; it exits non-zero on regressions.
+
+    python benchmarks/run.py --sizes 10x4 1000x8
+    python benchmarks/run.py --sizes 1000x8 --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.generate import generate
+from components import charts
+from config import KPI_TARGETS, evaluate_status, evaluate_status_batch
+from data_loader import compute_aggregates, load_companies, load_store
+from store import BLOCK_SLICES, METRICS, METRIC_INDEX, MetricStore
+
+DATA_CACHE_DIR = BENCH_DIR / ".data"
+RESULTS_DIR = BENCH_DIR / "results"
+DEFAULT_SIZES = ["10x4", "1000x8"]
+REGRESSION_RATIO = 1.25
+
+
+def _time(fn: Callable, repeat: int) -> list[float]:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def _data_dir(companies: int, quarters: int, seed: int) -> Path:
+    """Generated data directory for a size, regenerated only when missing."""
+    out = DATA_CACHE_DIR / f"{companies}x{quarters}-seed{seed}"
+    if not (out / "portfolio_companies.json").exists():
+        generate(out, companies, quarters, seed)
+    return out
+
+
+def _chart_calls(store: MetricStore) -> dict[str, Callable]:
+    """One representative call per chart factory, sized like the pages use them."""
+    names = store.meta["name"]
+    colors = ["#00905D"] * len(store)
+    latest = store.latest_values()
+    beneficiaries = np.nan_to_num(latest[:, METRIC_INDEX["total_beneficiaries"]]).tolist()
+    female = np.nan_to_num(latest[:, METRIC_INDEX["female_participation_pct"]]).tolist()
+    users = np.nan_to_num(store.column("registered_users")[0]).tolist()
+    radar_metrics = ["female_participation_pct", "youth_participation_pct", "income_improvement_pct"]
+    radar = {n: np.nan_to_num(latest[i, [METRIC_INDEX[m] for m in radar_metrics]]).tolist()
+             for i, n in enumerate(names)}
+    completeness = [[float(store.mask[i, -1, s].mean()) for s in BLOCK_SLICES.values()]
+                    for i in range(len(store))]
+    return {
+        "horizontal_bar": lambda: charts.horizontal_bar(names, beneficiaries, colors),
+        "donut_chart": lambda: charts.donut_chart(["Female", "Male"], [40, 60], colors[:2]),
+        "line_chart": lambda: charts.line_chart(store.quarters, {"Users": users}, {}),
+        "radar_chart": lambda: charts.radar_chart(radar_metrics, radar, {}),
+        "africa_map": lambda: charts.africa_map(names, [9.0] * len(store), [7.5] * len(store),
+                                                beneficiaries, colors, names),
+        "grouped_bar": lambda: charts.grouped_bar(names, {"Female %": female}, {}),
+        "data_completeness_heatmap": lambda: charts.data_completeness_heatmap(
+            names, [b.capitalize() for b in BLOCK_SLICES], completeness),
+    }
+
+
+def bench_size(companies: int, quarters: int, repeat: int, seed: int, pages: bool) -> list[dict]:
+    data_dir = _data_dir(companies, quarters, seed)
+    path = data_dir / "portfolio_companies.json"
+    store = load_store(path)
+    latest = store.latest_values()
+    keys = [k for k in METRICS if k in KPI_TARGETS]
+    scalar_values = [(k, None if np.isnan(v) else float(v))
+                     for row in latest[:, [METRIC_INDEX[k] for k in keys]].tolist()
+                     for k, v in zip(keys, row)]
+
+    calls = {
+        "load_store": lambda: load_store(path),
+        # The difference from load_store is the cost of schema validation
+        "load_store_unvalidated": lambda: load_store(path, validate=False),
+        "load_companies": lambda: list(load_companies(path)),
+        "compute_aggregates": lambda: compute_aggregates(store),
+        "evaluate_status": lambda: [evaluate_status(k, v) for k, v in scalar_values],
+        "evaluate_status_batch": lambda: evaluate_status_batch(METRICS, store.values),
+    }
+    # Factory plus JSON serialization: what a figure cache miss costs
+    calls.update({f"chart:{name}": (lambda fn=fn: fn().to_json())
+                  for name, fn in _chart_calls(store).items()})
+
+    results = [{"name": name, "runs": _time(fn, repeat)} for name, fn in calls.items()]
+    if pages:
+        out = subprocess.run(
+            [sys.executable, str(BENCH_DIR / "pages.py"), "--repeat", str(repeat)],
+            env={**os.environ, "DASHBOARD_DATA_DIR": str(data_dir)},
+            capture_output=True, text=True, check=True,
+        )
+        results.extend(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    size = f"{companies}x{quarters}"
+    for r in results:
+        r.update(size=size, min_s=min(r["runs"]), median_s=statistics.median(r["runs"]))
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: list[dict], baseline_path: Path) -> list[str]:
+    """Print median ratios against a baseline run; return the regressed benchmarks."""
+    baseline = {(r["size"], r["name"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    regressed = []
+    print(f"\n{'size':>10}  {'benchmark':<36} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r["size"], r["name"]))
+        if old is None:
+            continue
+        ratio = r["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+        print(f"{r['size']:>10}  {r['name']:<36} {old['median_s'] * 1000:>8.1f}ms "
+              f"{r['median_s'] * 1000:>8.1f}ms {ratio:>6.2f}x{flag}")
+        if flag:
+            regressed.append(f"{r['size']} {r['name']}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help="companies x quarters, e.g. 10x4 1000x8 100000x80")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-pages", dest="pages", action="store_false",
+                        help="skip the page-script benchmarks")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        companies, quarters = (int(n) for n in size.lower().split("x"))
+        print(f"Benchmarking {companies} companies × {quarters} quarters…", flush=True)
+        for r in bench_size(companies, quarters, args.repeat, args.seed, args.pages):
+            print(f"  {r['name']:<36} median {r['median_s'] * 1000:>9.1f} ms   min {r['min_s'] * 1000:>9.1f} ms")
+            results.append(r)
+
+    commit = _git_commit()
+    now = datetime.now(timezone.utc)
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out = RESULTS_DIR / f"{now:%Y%m%d-%H%M%S}-{commit}.json"
+    out.write_text(json.dumps({
+        "timestamp": now.isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }, indent=2))
+    print(f"\nWrote {out.relative_to(ROOT)}")
+
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
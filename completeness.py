@@ -0,0 +1,78 @@
+"""Reporting completeness per company × metric block × quarter.
+
+A company is expected to report the metrics that any company in its sector
+has ever reported; metrics no peer reports (spoilage for a QSR, say) don't
+count against it. Coverage is the share of a block's expected metrics
+reported in a quarter. It is 0 when the snapshot is missing after the company
+started reporting, and NaN before its first snapshot or where a block has no
+expected metrics. The whole cube is one vectorized pass over the store's null
+mask, computed once per dataset version (see Dataset.completeness).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from store import BLOCK_SLICES, MetricStore
+
+BLOCKS = list(BLOCK_SLICES)
+
+
+@dataclass(frozen=True)
+class Completeness:
+    store: MetricStore
+    coverage: np.ndarray  # (company, block, quarter) in [0, 1], NaN where not applicable
+    expected: np.ndarray  # (company, block) expected metric counts
+
+    @classmethod
+    def from_store(cls, store: MetricStore) -> "Completeness":
+        sectors = np.asarray([s.value for s in store.meta["sector"]], dtype=object)
+        _, sector_idx = np.unique(sectors, return_inverse=True)
+        sector_idx = sector_idx.ravel()
+
+        # (sector, metric): reported by any company in the sector, in any quarter
+        ever = store.mask.any(axis=1)
+        sector_expected = np.zeros((sector_idx.max(initial=-1) + 1, ever.shape[1]), dtype=bool)
+        np.logical_or.at(sector_expected, sector_idx, ever)
+        expected = sector_expected[sector_idx]
+
+        # Sum reported and expected metrics per contiguous block slice
+        starts = [s.start for s in BLOCK_SLICES.values()]
+        reported = np.add.reduceat(store.mask & expected[:, None, :], starts, axis=2)
+        expected_counts = np.add.reduceat(expected, starts, axis=1)
+
+        # 0 / 0 leaves NaN where a block has no expected metrics
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = reported / expected_counts[:, None, :]
+        started = np.cumsum(store.present, axis=1) > 0
+        coverage[~started] = np.nan
+        coverage = np.ascontiguousarray(coverage.transpose(0, 2, 1))
+        coverage.flags.writeable = False
+        return cls(store, coverage, expected_counts)
+
+    def quarter(self, quarter: str) -> np.ndarray:
+        """(company, block) coverage in one quarter."""
+        return self.coverage[:, :, self.store.quarter_index[quarter]]
+
+    def overall(self, quarter: str) -> np.ndarray:
+        """Per company, coverage of all expected metrics in one quarter (NaN before first report)."""
+        cov = self.quarter(quarter)
+        weights = np.where(np.isnan(cov), 0, self.expected)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nansum(cov * weights, axis=1) / weights.sum(axis=1)
+
+    def portfolio_trend(self) -> np.ndarray:
+        """(block, quarter) mean coverage across companies that had started reporting."""
+        with np.errstate(invalid="ignore"):
+            counts = (~np.isnan(self.coverage)).sum(axis=0)
+            return np.where(counts > 0, np.nansum(self.coverage, axis=0) / np.maximum(counts, 1), np.nan)
+
+    def company(self, key: int | str, quarter: str) -> dict[str, float]:
+        """One company's coverage per block in a quarter."""
+        return dict(zip(BLOCKS, self.quarter(quarter)[self.store.position(key)].tolist()))
+
+    def gaps(self, quarter: str, threshold: float = 1.0) -> np.ndarray:
+        """Rows of companies below ``threshold`` overall coverage in a quarter, worst first."""
+        overall = self.overall(quarter)
+        rows = np.flatnonzero(overall < threshold)
+        return rows[np.argsort(overall[rows], kind="stable")]
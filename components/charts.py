@@ -1,7 +1,6 @@
 """Plotly chart factory functions for the portfolio dashboard."""
 
 import plotly.graph_objects as go
-import plotly.express as px
 
 
 def _hex_to_rgba(hex_color: str, alpha: float = 1.0) -> str:
@@ -11,6 +10,21 @@ def _hex_to_rgba(hex_color: str, alpha: float = 1.0) -> str:
     return f"rgba({r},{g},{b},{alpha})"
 
 
+# Dark Africa base map shared by the map factories
+_AFRICA_GEO = dict(
+    scope="africa",
+    bgcolor="rgba(0,0,0,0)",
+    lakecolor="rgba(0,0,0,0)",
+    landcolor="#1B1F2B",
+    countrycolor="#2A2F3F",
+    coastlinecolor="#2A2F3F",
+    showframe=False,
+    showocean=True,
+    oceancolor="#0E1117",
+    projection_type="natural earth",
+    lonaxis=dict(range=[-20, 55]),
+)
+
 # Shared layout defaults
 _LAYOUT_DEFAULTS = dict(
     paper_bgcolor="rgba(0,0,0,0)",
@@ -157,20 +171,36 @@ def africa_map(names: list[str], lats: list[float], lons: list[float],
     fig.update_layout(
         **_LAYOUT_DEFAULTS,
         height=420,
-        geo=dict(
-            scope="africa",
-            bgcolor="rgba(0,0,0,0)",
-            lakecolor="rgba(0,0,0,0)",
-            landcolor="#1B1F2B",
-            countrycolor="#2A2F3F",
-            coastlinecolor="#2A2F3F",
-            showframe=False,
-            showocean=True,
-            oceancolor="#0E1117",
-            projection_type="natural earth",
-            lonaxis=dict(range=[-20, 55]),
-            lataxis=dict(range=[-5, 20]),
+        geo=dict(**_AFRICA_GEO, lataxis=dict(range=[-5, 20])),
+    )
+    return fig
+
+
+def africa_cluster_map(lats: list[float], lons: list[float], counts: list[int],
+                       beneficiaries: list[float], labels: list[str]) -> go.Figure:
+    """Lightweight map of clustered locations: no per-point hover strings or outlines.
+
+    Marker area scales with beneficiaries; multi-company clusters show their count.
+    """
+    peak = max(beneficiaries, default=0) or 1
+    fig = go.Figure(go.Scattergeo(
+        lat=lats,
+        lon=lons,
+        text=[str(n) if n > 1 else "" for n in counts],
+        customdata=list(zip(labels, beneficiaries)),
+        hovertemplate="<b>%{customdata[0]}</b><br>Beneficiaries: %{customdata[1]:,.0f}<extra></extra>",
+        marker=dict(
+            size=[10 + 30 * (b / peak) ** 0.5 for b in beneficiaries],
+            color="#00905D",
+            opacity=0.75,
         ),
+        mode="markers+text",
+        textfont=dict(color="#FAFAFA", size=10),
+    ))
+    fig.update_layout(
+        **_LAYOUT_DEFAULTS,
+        height=420,
+        geo=dict(**_AFRICA_GEO, lataxis=dict(range=[-35, 38])),
     )
     return fig
 
@@ -201,21 +231,49 @@ def grouped_bar(categories: list[str], groups: dict[str, list[float]],
     return fig
 
 
+def sdg_matrix(companies: list[str], goals: list[str], aligned: list[list[int]]) -> go.Figure:
+    """Company × SDG alignment grid as one heatmap trace (1 = aligned)."""
+    fig = go.Figure(go.Heatmap(
+        z=aligned,
+        x=goals,
+        y=companies,
+        zmin=0,
+        zmax=1,
+        colorscale=[[0.0, "#2A2F3F"], [1.0, "#00905D"]],
+        showscale=False,
+        xgap=3,
+        ygap=3,
+        hovertemplate="%{y} · %{x}<extra></extra>",
+    ))
+    fig.update_layout(
+        **_LAYOUT_DEFAULTS,
+        height=60 + 28 * len(companies),
+        xaxis=dict(side="top", showgrid=False),
+        yaxis=dict(autorange="reversed", showgrid=False),
+    )
+    return fig
+
+
 def data_completeness_heatmap(companies: list[str], categories: list[str],
                                values: list[list[float]]) -> go.Figure:
-    """Heatmap showing data completeness per company per KPI category."""
+    """Heatmap showing data completeness per company per KPI category.
+
+    NaN values (nothing expected, or before the first report) show as "n/a".
+    """
     colorscale = [
         [0.0, "#EF4444"],
         [0.5, "#F59E0B"],
         [1.0, "#10B981"],
     ]
     fig = go.Figure(go.Heatmap(
-        z=values,
+        z=[[None if v != v else v for v in row] for row in values],
         x=categories,
         y=companies,
+        zmin=0,
+        zmax=1,
         colorscale=colorscale,
         showscale=False,
-        text=[[f"{int(v*100)}%" for v in row] for row in values],
+        text=[["n/a" if v != v else f"{int(v*100)}%" for v in row] for row in values],
         texttemplate="%{text}",
         textfont=dict(size=12, color="#FAFAFA"),
         hovertemplate="%{y} - %{x}: %{text}<extra></extra>",
@@ -0,0 +1,106 @@
+"""Bounded LRU cache of built Plotly figures, shared across sessions.
+
+Figures are keyed on a stable hash of the factory name, its arguments and any
+layout overrides, and stored as the built ``go.Figure``. st.plotly_chart takes
+a Figure as already validated and only serializes it, whereas a dict spec is
+validated again on every render. Each entry is costed at the size of its JSON
+spec, measured once when built, and entries are evicted least-recently-used
+once the total exceeds the budget. Cached figures are shared, so callers
+must not modify them.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+import tracing
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+@dataclass
+class FigureCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+def _jsonable(obj):
+    """json.dumps fallback for NumPy scalars/arrays and other non-JSON inputs."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return repr(obj)
+
+
+def figure_key(factory: Callable, args: tuple, kwargs: dict, layout: dict | None) -> str:
+    """Stable hash of a factory call and its layout overrides."""
+    payload = json.dumps(
+        [factory.__module__, factory.__qualname__, args, kwargs, layout],
+        sort_keys=True,
+        default=_jsonable,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class FigureCache:
+    """Size-bounded LRU of built figures with hit/miss counters."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.stats = FigureCacheStats()
+        # key -> (figure, JSON size in bytes)
+        self._entries: OrderedDict[str, tuple[go.Figure, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, factory: Callable, *args, layout: dict | None = None, **kwargs) -> go.Figure:
+        """Return the shared figure for ``factory(*args, **kwargs)`` with ``layout`` applied."""
+        key = figure_key(factory, args, kwargs, layout)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[0]
+            self.stats.misses += 1
+
+        # Build outside the lock; a concurrent duplicate build is harmless
+        with tracing.span(f"chart:{factory.__name__}", "chart"):
+            fig = factory(*args, **kwargs)
+            if layout:
+                fig.update_layout(**layout)
+            size = len(pio.to_json(fig, validate=False))
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (fig, size)
+                self.stats.bytes += size
+            while self.stats.bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.stats.bytes -= evicted
+                self.stats.evictions += 1
+            self.stats.entries = len(self._entries)
+            return self._entries[key][0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.stats.bytes = self.stats.entries = 0
+
+
+FIGURE_CACHE = FigureCache()
+
+
+def plotly_chart_cached(factory: Callable, *args, layout: dict | None = None, **kwargs) -> None:
+    """Render a chart factory's figure through the shared figure cache."""
+    fig = FIGURE_CACHE.get(factory, *args, layout=layout, **kwargs)
+    with tracing.span("st.plotly_chart", "widget"):
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,20 @@
+"""Number formatting shared by pages and the KPI registry."""
+
+
+def format_number(n: float | int | None, currency: bool = False) -> str:
+    """Compact display form: 1.2M, 3.4K, or a plain comma-separated number."""
+    if n is None:
+        return "N/A"
+    prefix = "$" if currency else ""
+    if n >= 1_000_000:
+        return f"{prefix}{n / 1_000_000:.1f}M"
+    if n >= 1_000:
+        return f"{prefix}{n / 1_000:.1f}K"
+    return f"{prefix}{n:,.0f}"
+
+
+def format_growth(g: float | None) -> str:
+    """Signed percentage for a fractional change, e.g. +12.8%; N/A when unknown."""
+    if g is None or g != g:
+        return "N/A"
+    return f"{g:+.1%}"
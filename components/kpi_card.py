@@ -2,6 +2,8 @@
 
 import streamlit as st
 
+import tracing
+
 
 STATUS_BADGE_MAP = {
     "green": ("On track", ":material/check_circle:", "green"),
@@ -11,6 +13,7 @@ STATUS_BADGE_MAP = {
 }
 
 
+@tracing.traced("widget")
 def render_kpi_card(
     label: str,
     value: str,
@@ -36,6 +39,7 @@ def render_kpi_card(
         )
 
 
+@tracing.traced("widget")
 def render_company_scorecard(
     name: str,
     country: str,
@@ -0,0 +1,108 @@
+"""Rollup page shared by the sector and country views, reading materialized tables."""
+
+import numpy as np
+import streamlit as st
+
+from components.charts import horizontal_bar, line_chart
+from components.figure_cache import plotly_chart_cached
+from components.formatting import format_number
+from config import BRAND
+from timeseries import chart_values
+
+DIMENSION_LABELS = {"sector": "Sector", "country": "Country", "fund": "Fund"}
+
+# Table column -> (metric, aggregation)
+ROLLUP_COLUMNS = {
+    "Beneficiaries": ("total_beneficiaries", "sum"),
+    "Direct jobs": ("direct_jobs", "sum"),
+    "Funding": ("total_funding_usd", "sum"),
+    "Female %": ("female_participation_pct", "weighted_mean"),
+    "Youth %": ("youth_participation_pct", "weighted_mean"),
+}
+_COLUMN_CONFIG = {
+    "Companies": st.column_config.NumberColumn(format="%d"),
+    "Beneficiaries": st.column_config.NumberColumn(format="compact"),
+    "Direct jobs": st.column_config.NumberColumn(format="compact"),
+    "Funding": st.column_config.NumberColumn(format="dollar"),
+    "Female %": st.column_config.NumberColumn(format="%.1f%%", help="Weighted by beneficiaries"),
+    "Youth %": st.column_config.NumberColumn(format="%.1f%%", help="Weighted by beneficiaries"),
+}
+
+
+def _rollup_table(rollups, dimension: str, as_of: str, where: dict[str, str]) -> dict[str, list]:
+    """One row per group of ``dimension`` with companies as of the quarter."""
+    companies = rollups.companies((dimension,), as_of, where)
+    keys = [key for key, n in companies.items() if n]
+    columns = {DIMENSION_LABELS[dimension]: [key[0] for key in keys], "Companies": [companies[key] for key in keys]}
+    for label, (metric, agg) in ROLLUP_COLUMNS.items():
+        values = rollups.query(metric, (dimension,), agg, as_of, where)
+        columns[label] = [values[key] for key in keys]
+    return columns
+
+
+def render_rollup_page(dimension: str, drill: str) -> None:
+    """Totals per ``dimension`` value, then a drill-down into one value by ``drill``."""
+    store = st.session_state.store
+    as_of = st.session_state.as_of
+    rollups = st.session_state.dataset.rollups
+    label = DIMENSION_LABELS[dimension]
+
+    st.title(f"{label} view")
+    st.caption(f"As of {as_of} · latest reported values, beneficiary-weighted percentages")
+
+    where = {}
+    funds = rollups.labels["fund"]
+    if len(funds) > 1:
+        fund = st.selectbox("Fund", ["All funds", *funds])
+        if fund != "All funds":
+            where["fund"] = fund
+
+    table = _rollup_table(rollups, dimension, as_of, where)
+    names = table[label]
+    if not names:
+        st.info("No companies have reported yet.", icon=":material/hourglass_empty:")
+        return
+
+    with st.container(border=True):
+        st.dataframe(table, column_config=_COLUMN_CONFIG, hide_index=True)
+
+    beneficiaries = np.array(table["Beneficiaries"], dtype=float)
+    charted = np.flatnonzero(~np.isnan(beneficiaries))
+    if len(charted):
+        with st.container(border=True):
+            plotly_chart_cached(
+                horizontal_bar,
+                [names[i] for i in charted],
+                beneficiaries[charted].tolist(),
+                [BRAND["green"]] * len(charted),
+                title=f"Beneficiaries by {label.lower()}",
+                layout=dict(height=max(280, 60 + 32 * len(charted))),
+            )
+
+    # Drill-down into one group, answered from the finer materialized tables
+    st.subheader("Drill down")
+    selected = st.selectbox(label, names)
+    inner = {**where, dimension: selected}
+    with st.container(horizontal=True):
+        st.metric("Companies", rollups.companies((), as_of, inner)[()], border=True)
+        for metric_label, metric in (("Beneficiaries", "total_beneficiaries"), ("Direct jobs", "direct_jobs")):
+            total = rollups.query(metric, (), "sum", as_of, inner)[()]
+            st.metric(metric_label, format_number(None if np.isnan(total) else total), border=True)
+        female = rollups.query("female_participation_pct", (), "weighted_mean", as_of, inner)[()]
+        st.metric("Female participation", "N/A" if np.isnan(female) else f"{female:.0f}%", border=True)
+
+    col_left, col_right = st.columns(2)
+    with col_left:
+        with st.container(border=True):
+            st.markdown(f"**{selected} by {DIMENSION_LABELS[drill].lower()}**")
+            st.dataframe(_rollup_table(rollups, drill, as_of, inner), column_config=_COLUMN_CONFIG, hide_index=True)
+    with col_right:
+        with st.container(border=True):
+            end = store.quarter_position(as_of) + 1
+            plotly_chart_cached(
+                line_chart,
+                store.quarters[:end],
+                {"Beneficiaries": chart_values(rollups.series("total_beneficiaries", "sum", inner)[:end])},
+                {"Beneficiaries": BRAND["green"]},
+                title=f"Beneficiaries in {selected}",
+            )
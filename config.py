@@ -1,5 +1,30 @@
 """Brand colors, traffic light thresholds, and layout constants."""
 
+import json
+import os
+from pathlib import Path
+
+# Directory holding portfolio_companies.json and kpi_targets.json
+DATA_DIR = Path(os.environ.get("DASHBOARD_DATA_DIR") or Path(__file__).parent / "data")
+
+# Where the company detail page reads from: "memory" (the loaded dataset) or
+# "sqlite" (data/portfolio.sqlite, kept current by sqlite_source.py)
+DATA_BACKEND = os.environ.get("DASHBOARD_DATA_BACKEND", "memory")
+
+# "lazy" imports heavy modules (chart factories, ...) with the first page that
+# needs them; "eager" imports them all before the first page renders
+STARTUP_MODE = os.environ.get("DASHBOARD_STARTUP_MODE", "lazy")
+
+# Opt-in timing spans (tracing.py): on at startup when DASHBOARD_TRACING=1,
+# kept in a ring buffer of TRACE_BUFFER_SIZE spans, and rewritten as a Chrome
+# trace to DASHBOARD_TRACE_FILE after every page run when that is set
+TRACING = os.environ.get("DASHBOARD_TRACING") == "1"
+TRACE_BUFFER_SIZE = 20_000
+TRACE_FILE = os.environ.get("DASHBOARD_TRACE_FILE")
+
+# Fund a company belongs to when its record doesn't name one
+DEFAULT_FUND = "Fund IV"
+
 # Brand palette
 BRAND = {
     "green": "#00905D",
@@ -25,26 +50,24 @@ TRAFFIC = {
     "grey": "#6B7280",
 }
 
-# Company accent colors (for charts)
-COMPANY_COLORS = {
-    "complete-farmer": "#00905D",
-    "agroeknor": "#FBB500",
-    "koolboks": "#3B82F6",
-    "yikodeen": "#FF6C05",
-    "toasties": "#8B5CF6",
-}
+# Company accent colors for charts, assigned in load order so any fund's
+# companies get distinct colors without being listed here
+COMPANY_PALETTE = ("#00905D", "#FBB500", "#3B82F6", "#FF6C05", "#8B5CF6", "#14B8A6", "#EC4899", "#84CC16")
 
-# Traffic light targets: (target_value, higher_is_better)
-KPI_TARGETS = {
-    "female_participation_pct": (35.0, True),   # 35% is strong in African PE context
-    "youth_participation_pct": (40.0, True),
-    "income_improvement_pct": (10.0, True),
-    "default_rate_pct": (5.0, False),
-    "yield_increase_pct": (20.0, True),         # 20% yield increase is significant
-    "protocol_adherence_pct": (80.0, True),
-    "gross_margin_pct": (35.0, True),
-    "spoilage_reduction_pct": (40.0, True),
-}
+
+def company_color(row: int) -> str:
+    """Accent color for the company at a store row."""
+    return COMPANY_PALETTE[row % len(COMPANY_PALETTE)]
+
+
+# Traffic light targets: (target_value, higher_is_better), from data/kpi_targets.json
+def _load_kpi_targets() -> dict[str, tuple[float, bool]]:
+    path = DATA_DIR / "kpi_targets.json"
+    targets = json.loads(path.read_text(encoding="utf-8"))["targets"]
+    return {key: (t["target"], t["higher_is_better"]) for key, t in targets.items()}
+
+
+KPI_TARGETS = _load_kpi_targets()
 
 # Variance thresholds
 GREEN_THRESHOLD = 0.05   # within 5% of target
@@ -77,3 +100,40 @@ def evaluate_status(metric_key: str, value: float | None) -> str:
             return "yellow"
         else:
             return "red"
+
+
+# Status codes returned by evaluate_status_batch; each code indexes its status name.
+# Codes increase with severity (after grey, "no data"), so max() is the worst status.
+STATUS_CODES = ("grey", "green", "yellow", "red")
+GREY, GREEN, YELLOW, RED = range(len(STATUS_CODES))
+
+
+def evaluate_status_batch(metric_keys: list[str], values,
+                          targets: dict[str, tuple[float, bool]] | None = None) -> "np.ndarray":
+    """Vectorized evaluate_status over an array whose last axis is metric_keys.
+
+    ``values`` may be a 1-D row of values or any stacked array of them, such as
+    the full company × quarter × metric cube. None and NaN score grey, as do
+    metrics without a target. ``targets`` defaults to KPI_TARGETS. Returns an
+    int8 array of codes into STATUS_CODES.
+    """
+    # Imported here so that importing config (app.py does at startup) stays cheap
+    import numpy as np
+
+    targets = KPI_TARGETS if targets is None else targets
+    values = np.asarray(values, dtype=float)
+    known = np.array([k in targets for k in metric_keys])
+    target = np.array([targets[k][0] if k in targets else 0.0 for k in metric_keys])
+    higher = np.array([targets[k][1] if k in targets else True for k in metric_keys])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(target != 0, values / np.where(target != 0, target, 1.0), 1.0)
+
+    green = np.where(higher, ratio >= 1.0 - GREEN_THRESHOLD, ratio <= 1.0 + GREEN_THRESHOLD)
+    yellow = np.where(higher, ratio >= 1.0 - YELLOW_THRESHOLD, ratio <= 1.0 + YELLOW_THRESHOLD)
+
+    codes = np.full(values.shape, RED, dtype=np.int8)
+    codes[yellow] = YELLOW
+    codes[green] = GREEN
+    codes[np.isnan(values) | ~known] = GREY
+    return codes
@@ -0,0 +1,384 @@
+"""Process-wide dataset cache keyed on data-file fingerprints.
+
+Data is split into fund partitions (see partitions.py). Each partition is
+loaded and cached on its own, and only the funds a session views are loaded;
+a Dataset is built per fund selection from the partition stores. Each access
+stats the manifest, the KPI targets and the selected partitions' files. Only
+files whose mtime or size moved are re-hashed, and only partitions whose
+content hash changed are reloaded, in parallel. Submissions appended to the
+ingest journal (see ingest.py) are applied to the loaded stores as deltas, and
+the headline aggregates are updated company by company instead of rescanned.
+The new Dataset is built completely before it replaces the old one, so readers
+always see either the old or the new version, never a mix.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+
+import tracing
+from completeness import Completeness
+from data_loader import DATA_DIR, PortfolioAggregates, file_sha256, load_kpi_config
+from ingest import JOURNAL_FILE, apply_entries, read_journal
+from kpi_registry import KPIRegistry
+from partitions import MANIFEST_FILE, Partition, load_partition, read_manifest
+from rollups import Rollups
+from store import MetricStore, concat_stores
+from timeseries import TimeSeriesCube
+
+TARGETS_FILE = "kpi_targets.json"
+# Most partitions loaded at once when a selection needs several
+PARTITION_WORKERS = 4
+# Fund selections whose Dataset stays cached, least recently used evicted first
+MAX_SELECTIONS = 4
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    mtime_ns: int
+    size: int
+    sha256: str
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """One immutable version of the loaded data; ``version`` changes with any file content.
+
+    A Dataset is shared read-only by every session in the process; sessions
+    keep references to it, never copies.
+    """
+    store: MetricStore
+    aggregates: PortfolioAggregates
+    kpi_config: dict
+    kpis: KPIRegistry
+    version: str
+    funds: tuple[str, ...] = ()
+    partition_versions: tuple[str, ...] = field(default=(), repr=False)
+    journal_seq: int = field(default=0, repr=False)
+    _aggregates_as_of: dict[str, PortfolioAggregates] = field(default_factory=dict, repr=False, compare=False)
+
+    def aggregates_at(self, as_of: str | None) -> PortfolioAggregates:
+        """Aggregates as of a past quarter, computed once and shared by all sessions."""
+        if as_of is None or as_of == (self.store.quarters[-1] if self.store.quarters else None):
+            return self.aggregates
+        if as_of not in self._aggregates_as_of:
+            self._aggregates_as_of[as_of] = PortfolioAggregates.from_store(self.store, as_of)
+        return self._aggregates_as_of[as_of]
+
+    @cached_property
+    def completeness(self) -> Completeness:
+        """Reporting completeness cube, built on first use and shared by all sessions."""
+        return Completeness.from_store(self.store)
+
+    @cached_property
+    def timeseries(self) -> TimeSeriesCube:
+        """Growth, rolling and cumulative series, built on first use and shared by all sessions."""
+        return TimeSeriesCube.from_store(self.store)
+
+    @cached_property
+    def rollups(self) -> Rollups:
+        """Sector / country / fund group-by tables, built on first use and shared by all sessions."""
+        return Rollups(self.store)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    reloads: dict[str, int] = field(default_factory=dict)
+    last_reload_s: float | None = None
+    last_reload_files: tuple[str, ...] = ()
+
+
+@dataclass
+class _PartitionEntry:
+    fingerprints: dict[Path, FileFingerprint]
+    store: MetricStore
+    base_version: str
+    # Journal entries read so far, and the positions of those applied to this store
+    seen: int = 0
+    applied: list[int] = field(default_factory=list)
+
+    @property
+    def version(self) -> str:
+        return f"{self.base_version}+{len(self.applied)}" if self.applied else self.base_version
+
+
+class DatasetCache:
+    """Holds loaded fund partitions and Datasets built from them; reloads only what changed."""
+
+    def __init__(self, data_dir: Path = DATA_DIR, max_workers: int = PARTITION_WORKERS):
+        self.data_dir = data_dir
+        self.max_workers = max_workers
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._manifest_stat: tuple[int, int] | None = None
+        self._partitions: dict[str, Partition] = {}
+        self._entries: dict[str, _PartitionEntry] = {}
+        self._targets: FileFingerprint | None = None
+        self._kpi_config: dict | None = None
+        self._datasets: OrderedDict[tuple[str, ...], Dataset] = OrderedDict()
+        self._journal: list[dict] = []
+        self._journal_stat: tuple[int, int] | None = None
+        self._journal_offset = 0
+
+    @property
+    def funds(self) -> list[str]:
+        """Funds in the manifest, in manifest order."""
+        with self._lock:
+            self._refresh_manifest()
+            return list(self._partitions)
+
+    @tracing.traced("data")
+    def get(self, funds: Iterable[str] | None = None) -> Dataset:
+        """The Dataset for ``funds`` (default: all funds), reloading changed partitions first."""
+        funds = None if funds is None else set(funds)
+        if self._partitions:
+            key = self._key(funds)
+            dataset = self._datasets.get(key)
+            if dataset is not None and not self._stale(key):
+                self.stats.hits += 1
+                try:
+                    self._datasets.move_to_end(key)
+                except KeyError:
+                    # Evicted by a reload in another session since the lookup
+                    pass
+                return dataset
+
+        with self._lock:
+            # Another session may have reloaded while we waited for the lock
+            start = time.perf_counter()
+            reloaded = []
+            if self._refresh_manifest() and self._manifest_stat is not None:
+                reloaded.append(MANIFEST_FILE)
+            key = self._key(funds)
+            if self._refresh_targets():
+                reloaded.append(TARGETS_FILE)
+            if self._refresh_journal():
+                reloaded.append(JOURNAL_FILE)
+            reloaded += self._reload_partitions(key)
+            self._apply_journal(key)
+
+            entries = [self._entries[fund] for fund in key]
+            version = hashlib.sha256(
+                "".join([*key, *(e.version for e in entries), self._targets.sha256]).encode()
+            ).hexdigest()[:12]
+            old = self._datasets.pop(key, None)
+            if old is not None and old.version == version:
+                self.stats.hits += 1
+                self._datasets[key] = old
+                return old
+
+            self.stats.misses += 1
+            partition_versions = tuple(e.base_version for e in entries)
+            journal_seq = len(self._journal)
+            if old is not None and old.partition_versions == partition_versions:
+                # Same base files: only journal entries are new, so update the totals per company
+                store = concat_stores([e.store for e in entries])
+                aggregates = old.aggregates.copy()
+                for e in entries:
+                    for pos in e.applied:
+                        if pos >= old.journal_seq:
+                            cid = self._journal[pos]["company_id"]
+                            aggregates.add_company(cid)
+                            aggregates.update(cid, store.snapshot(cid))
+            else:
+                store = concat_stores([e.store for e in entries])
+                aggregates = PortfolioAggregates.from_store(store)
+            self._datasets[key] = Dataset(
+                store=store,
+                aggregates=aggregates,
+                kpi_config=self._kpi_config,
+                kpis=KPIRegistry(store, self._kpi_config),
+                version=version,
+                funds=key,
+                partition_versions=partition_versions,
+                journal_seq=journal_seq,
+            )
+            self._evict()
+
+            if reloaded:
+                self.stats.last_reload_s = time.perf_counter() - start
+                self.stats.last_reload_files = tuple(reloaded)
+                for name in reloaded:
+                    self.stats.reloads[name] = self.stats.reloads.get(name, 0) + 1
+            return self._datasets[key]
+
+    def _evict(self) -> None:
+        """Drop the least recently used selections past MAX_SELECTIONS, and partitions none of the rest use."""
+        while len(self._datasets) > MAX_SELECTIONS:
+            self._datasets.popitem(last=False)
+        used = {fund for key in self._datasets for fund in key}
+        for fund in list(self._entries):
+            if fund not in used:
+                del self._entries[fund]
+
+    def _key(self, funds: set[str] | None) -> tuple[str, ...]:
+        """A fund selection in manifest order."""
+        if funds is None:
+            return tuple(self._partitions)
+        unknown = funds - set(self._partitions)
+        if unknown:
+            raise ValueError(f"Unknown funds: {sorted(unknown)}")
+        return tuple(fund for fund in self._partitions if fund in funds)
+
+    @staticmethod
+    def _stat(path: Path) -> tuple[int, int] | None:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _journal_identity(path: Path) -> tuple[int, int] | None:
+        """Inode and size; compaction replaces the file, so its inode changes."""
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size
+
+    def _stale(self, key: tuple[str, ...]) -> bool:
+        """Whether the manifest, targets, journal or any selected partition file moved (cheap stat check)."""
+        if self._stat(self.data_dir / MANIFEST_FILE) != self._manifest_stat:
+            return True
+        if self._journal_identity(self.data_dir / JOURNAL_FILE) != self._journal_stat:
+            return True
+        if self._targets is None or self._stat(self.data_dir / TARGETS_FILE) != (self._targets.mtime_ns, self._targets.size):
+            return True
+        for fund in key:
+            entry = self._entries.get(fund)
+            if entry is None:
+                return True
+            files = self._partitions[fund].files()
+            if len(files) != len(entry.fingerprints) or any(
+                (fp := entry.fingerprints.get(path)) is None or self._stat(path) != (fp.mtime_ns, fp.size)
+                for path in files
+            ):
+                return True
+        return False
+
+    def _refresh_manifest(self) -> bool:
+        """Re-read the manifest if it moved; returns True if it did."""
+        stat = self._stat(self.data_dir / MANIFEST_FILE)
+        if self._partitions and stat == self._manifest_stat:
+            return False
+        self._partitions = {p.fund: p for p in read_manifest(self.data_dir)}
+        self._manifest_stat = stat
+        # Drop partitions that left the manifest; moved ones reload on their next use
+        for fund in list(self._entries):
+            if fund not in self._partitions:
+                del self._entries[fund]
+        return True
+
+    def _refresh_targets(self) -> bool:
+        """Reload kpi_targets.json if its content changed; returns True if it did."""
+        path = self.data_dir / TARGETS_FILE
+        st = path.stat()
+        fp = self._targets
+        if fp is not None and (fp.mtime_ns, fp.size) == (st.st_mtime_ns, st.st_size):
+            return False
+        new = FileFingerprint(st.st_mtime_ns, st.st_size, file_sha256(path))
+        self._targets = new
+        if fp is not None and fp.sha256 == new.sha256:
+            # Touched but not modified: remember the new stat, keep the config
+            return False
+        self._kpi_config = load_kpi_config(path)
+        return True
+
+    def _refresh_journal(self) -> bool:
+        """Read journal lines appended since the last read; returns True if there were any.
+
+        A replaced or truncated journal means it was compacted into the base
+        files, so every partition is reloaded from them.
+        """
+        path = self.data_dir / JOURNAL_FILE
+        identity = self._journal_identity(path)
+        if identity == self._journal_stat:
+            return False
+        old, self._journal_stat = self._journal_stat, identity
+        compacted = old is not None and (identity is None or identity[0] != old[0] or identity[1] < old[1])
+        if compacted:
+            self._journal, self._journal_offset = [], 0
+            self._entries.clear()
+            self._datasets.clear()
+        new, self._journal_offset = read_journal(path, self._journal_offset)
+        self._journal += new
+        return bool(new) or compacted
+
+    def _apply_journal(self, key: tuple[str, ...]) -> None:
+        """Apply journal entries each selected partition has not seen yet to its store."""
+        for fund in key:
+            entry = self._entries[fund]
+            if entry.seen == len(self._journal):
+                continue
+            store, applied = apply_entries(entry.store, self._journal[entry.seen:], fund)
+            entry.store = store
+            entry.applied += [entry.seen + k for k in applied]
+            entry.seen = len(self._journal)
+
+    def _changed_fingerprints(self, fund: str) -> dict[Path, FileFingerprint] | None:
+        """New fingerprints if the partition's content changed, else None (keeping touched stats)."""
+        partition = self._partitions[fund]
+        entry = self._entries.get(fund)
+        old = entry.fingerprints if entry is not None else {}
+        files = partition.files()
+        changed = entry is None or set(files) != set(old)
+        new = {}
+        for path in files:
+            st = path.stat()
+            fp = old.get(path)
+            if fp is None or (fp.mtime_ns, fp.size) != (st.st_mtime_ns, st.st_size):
+                sha = file_sha256(path)
+                changed |= fp is None or fp.sha256 != sha
+                fp = FileFingerprint(st.st_mtime_ns, st.st_size, sha)
+            new[path] = fp
+        if not changed:
+            entry.fingerprints = new
+            return None
+        return new
+
+    def _reload_partitions(self, key: tuple[str, ...]) -> list[str]:
+        """Reload the selected partitions whose content changed, in parallel; returns their funds."""
+        todo = {}
+        for fund in key:
+            fingerprints = self._changed_fingerprints(fund)
+            if fingerprints is not None:
+                todo[fund] = fingerprints
+        if not todo:
+            return []
+
+        def load(fund: str) -> MetricStore:
+            partition = self._partitions[fund]
+            # The single-file layout keeps its compiled snapshot where snapshot.py writes it
+            compiled = self.data_dir / "compiled"
+            return load_partition(partition, compiled if self._manifest_stat is None else compiled / partition.slug)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo))) as pool:
+            stores = list(pool.map(load, todo))
+        for (fund, fingerprints), store in zip(todo.items(), stores):
+            version = hashlib.sha256(
+                "".join(fp.sha256 for _, fp in sorted(fingerprints.items())).encode()
+            ).hexdigest()
+            self._entries[fund] = _PartitionEntry(fingerprints, store, version)
+        return list(todo)
+
+
+_default_cache: DatasetCache | None = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> DatasetCache:
+    """The process-wide cache shared by every session."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DatasetCache()
+        return _default_cache
@@ -1,93 +1,246 @@
 """Load portfolio data from JSON and compute aggregates."""
 
+import hashlib
 import json
+import math
+import re
+from collections.abc import Iterable, Iterator, Mapping
 from pathlib import Path
-from models import (
-    PortfolioCompany, QuarterlySnapshot, ImpactMetrics,
-    FinancialMetrics, OperationalMetrics, Sector,
-)
-
-DATA_DIR = Path(__file__).parent / "data"
-
-
-def _build_metrics(data: dict, cls):
-    """Build a dataclass instance from a dict, skipping unknown keys."""
-    import dataclasses
-    field_names = {f.name for f in dataclasses.fields(cls)}
-    filtered = {k: v for k, v in data.items() if k in field_names}
-    return cls(**filtered)
-
-
-def load_companies() -> list[PortfolioCompany]:
-    """Load all portfolio companies from JSON."""
-    path = DATA_DIR / "portfolio_companies.json"
-    raw = json.loads(path.read_text(encoding="utf-8"))
-
-    companies = []
-    for c in raw["companies"]:
-        snapshots = []
-        for s in c["snapshots"]:
-            snap = QuarterlySnapshot(
-                quarter=s["quarter"],
-                is_synthetic=s.get("is_synthetic", False),
-                impact=_build_metrics(s.get("impact", {}), ImpactMetrics),
-                financial=_build_metrics(s.get("financial", {}), FinancialMetrics),
-                operational=_build_metrics(s.get("operational", {}), OperationalMetrics),
-            )
-            snapshots.append(snap)
-
-        company = PortfolioCompany(
-            id=c["id"],
-            name=c["name"],
-            country=c["country"],
-            sector=Sector(c["sector"]),
-            iv_name=c["iv_name"],
-            founded_year=c["founded_year"],
-            description=c["description"],
-            snapshots=snapshots,
-        )
-        companies.append(company)
-
-    return companies
-
-
-def compute_aggregates(companies: list[PortfolioCompany]) -> dict:
-    """Compute portfolio-level aggregate metrics from the latest snapshot of each company."""
-    total_jobs = 0
-    total_beneficiaries = 0
-    total_funding = 0
-    female_pcts = []
-    youth_pcts = []
-
-    for co in companies:
-        latest = co.latest
-        if not latest:
-            continue
-
-        imp = latest.impact
-        fin = latest.financial
-
-        if imp.direct_jobs:
-            total_jobs += imp.direct_jobs
-        if imp.indirect_jobs:
-            total_jobs += imp.indirect_jobs
-        if imp.total_beneficiaries:
-            total_beneficiaries += imp.total_beneficiaries
-        if fin.total_funding_usd:
-            total_funding += fin.total_funding_usd
-        if imp.female_participation_pct is not None:
-            female_pcts.append(imp.female_participation_pct)
-        if imp.youth_participation_pct is not None:
-            youth_pcts.append(imp.youth_participation_pct)
-
-    avg_female = sum(female_pcts) / len(female_pcts) if female_pcts else None
-    avg_youth = sum(youth_pcts) / len(youth_pcts) if youth_pcts else None
-
-    return {
-        "total_jobs": total_jobs,
-        "total_beneficiaries": total_beneficiaries,
-        "total_funding_usd": total_funding,
-        "avg_female_pct": avg_female,
-        "avg_youth_pct": avg_youth,
-        "company_count": len(companies),
-    }
+
+import numpy as np
+
+import tracing
+from config import DATA_DIR
+from models import QuarterlySnapshot, parse_quarter
+from schema import load_schema
+from store import METRIC_BLOCK, MetricStore, StoreBuilder, CompanyView
+
+_CHUNK_SIZE = 1 << 20
+_COMPANIES_ARRAY_RE = re.compile(r'"companies"\s*:\s*\[')
+
+
+def iter_company_records(
+    path: Path | None = None,
+    ids: Iterable[str] | None = None,
+    sectors: Iterable[str] | None = None,
+    quarters: tuple[str, str] | None = None,
+) -> Iterator[dict]:
+    """Stream raw company records from a portfolio JSON file one at a time.
+
+    Only the current company (plus one read chunk) is held in memory, never the
+    whole file or its parsed tree. Companies can be filtered by id or sector,
+    and snapshots by an inclusive (first, last) quarter range.
+    """
+    path = path or DATA_DIR / "portfolio_companies.json"
+    ids = set(ids) if ids is not None else None
+    sectors = {str(getattr(s, "value", s)) for s in sectors} if sectors is not None else None
+    key_range = (parse_quarter(quarters[0]), parse_quarter(quarters[1])) if quarters else None
+    decoder = json.JSONDecoder()
+
+    with path.open(encoding="utf-8") as f:
+        buf = ""
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buf, eof
+            chunk = f.read(_CHUNK_SIZE)
+            eof = not chunk
+            buf += chunk
+            return not eof
+
+        while not (m := _COMPANIES_ARRAY_RE.search(buf)):
+            if not fill():
+                raise ValueError(f"{path}: no \"companies\" array found")
+        pos = m.end()
+
+        while True:
+            # Skip separators between array items, reading more when the buffer runs dry
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                buf, pos = "", 0
+                if not fill():
+                    raise ValueError(f"{path}: unterminated \"companies\" array")
+                continue
+            if buf[pos] == "]":
+                return
+
+            try:
+                c, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Record straddles the chunk boundary: drop consumed text and read on
+                buf, pos = buf[pos:], 0
+                fill()
+                continue
+            pos = end
+
+            if ids is not None and c["id"] not in ids:
+                continue
+            if sectors is not None and c["sector"] not in sectors:
+                continue
+            if key_range is not None:
+                c["snapshots"] = [
+                    s for s in c["snapshots"]
+                    if key_range[0] <= parse_quarter(s["quarter"]) <= key_range[1]
+                ]
+            yield c
+
+
+@tracing.traced("data")
+def load_store(
+    path: Path | None = None,
+    ids: Iterable[str] | None = None,
+    sectors: Iterable[str] | None = None,
+    quarters: tuple[str, str] | None = None,
+    validate: bool = True,
+) -> MetricStore:
+    """Stream portfolio companies (optionally filtered) into the columnar metric store.
+
+    Records are validated against the schema (see schema.py) on the way in;
+    a SchemaError lists every problem. With filters, JSON paths index the
+    filtered records.
+    """
+    records = iter_company_records(path, ids=ids, sectors=sectors, quarters=quarters)
+    if not validate:
+        builder = StoreBuilder()
+        for c in records:
+            builder.add(c)
+        return builder.build()
+    validator = load_schema().validator()
+    for c in records:
+        validator.add(c)
+    return validator.build(str(path or DATA_DIR / "portfolio_companies.json"))
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_kpi_config(path: Path | None = None) -> dict:
+    """Load kpi_targets.json: per-metric targets and the per-page KPI views."""
+    path = path or DATA_DIR / "kpi_targets.json"
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_companies(path: Path | None = None) -> CompanyView:
+    """Load all portfolio companies as a lazy PortfolioCompany view over the store."""
+    return load_store(path).companies
+
+
+class PortfolioAggregates(Mapping):
+    """Running portfolio totals over each company's latest snapshot.
+
+    Holds one contribution per company plus running sums and counts, so a new
+    or corrected snapshot updates the headline in O(1) instead of rescanning
+    the fund. Reads like the dict returned by compute_aggregates.
+    """
+
+    SUM_METRICS = ("direct_jobs", "indirect_jobs", "total_beneficiaries", "total_funding_usd")
+    MEAN_METRICS = ("female_participation_pct", "youth_participation_pct")
+    _METRICS = SUM_METRICS + MEAN_METRICS
+
+    def __init__(self):
+        # company id -> (quarter key or None, metric values aligned with _METRICS)
+        self._contrib: dict[str, tuple[int | None, tuple]] = {}
+        self._sums = dict.fromkeys(self._METRICS, 0.0)
+        self._counts = dict.fromkeys(self.MEAN_METRICS, 0)
+
+    @classmethod
+    @tracing.traced("data")
+    def from_store(cls, store: MetricStore, as_of: str | None = None) -> "PortfolioAggregates":
+        """Seed the running totals from each company's latest snapshot (as of a quarter)."""
+        agg = cls()
+        columns = np.column_stack([store.latest(m, as_of) for m in cls._METRICS])
+        for m, col in zip(cls._METRICS, columns.T):
+            agg._sums[m] = float(np.nansum(col))
+            if m in agg._counts:
+                agg._counts[m] = int((~np.isnan(col)).sum())
+
+        quarter_keys = [
+            int(store.quarter_keys[q]) if q >= 0 else None for q in store.as_of_idx(as_of).tolist()
+        ]
+        for cid, key, row in zip(store.ids, quarter_keys, columns.tolist()):
+            agg._contrib[cid] = (key, tuple(None if math.isnan(v) else v for v in row))
+        return agg
+
+    def copy(self) -> "PortfolioAggregates":
+        """An independent copy, so updates leave the totals other readers hold unchanged."""
+        agg = type(self)()
+        agg._contrib = dict(self._contrib)
+        agg._sums = dict(self._sums)
+        agg._counts = dict(self._counts)
+        return agg
+
+    def add_company(self, company_id: str) -> None:
+        """Count a company that has not reported any snapshot yet."""
+        self._contrib.setdefault(company_id, (None, (None,) * len(self._METRICS)))
+
+    def update(self, company_id: str, snapshot: QuarterlySnapshot) -> bool:
+        """Apply a new or corrected snapshot; returns True if the headline changed.
+
+        Snapshots older than the company's current latest quarter do not affect
+        the latest-quarter totals and are ignored.
+        """
+        key = parse_quarter(snapshot.quarter)
+        old_key, old_row = self._contrib.get(company_id, (None, (None,) * len(self._METRICS)))
+        if old_key is not None and key < old_key:
+            return False
+
+        row = tuple(getattr(getattr(snapshot, METRIC_BLOCK[m]), m) for m in self._METRICS)
+        self._apply(old_row, -1)
+        self._apply(row, +1)
+        self._contrib[company_id] = (key, row)
+        return True
+
+    def remove(self, company_id: str) -> None:
+        """Drop a company and its contribution from the totals."""
+        _, row = self._contrib.pop(company_id)
+        self._apply(row, -1)
+
+    def _apply(self, row: tuple, sign: int) -> None:
+        for m, value in zip(self._METRICS, row):
+            if value is None:
+                continue
+            self._sums[m] += sign * value
+            if m in self._counts:
+                self._counts[m] += sign
+
+    def as_dict(self) -> dict:
+        s, n = self._sums, self._counts
+        return {
+            "total_jobs": int(s["direct_jobs"] + s["indirect_jobs"]),
+            "total_beneficiaries": int(s["total_beneficiaries"]),
+            "total_funding_usd": s["total_funding_usd"],
+            "avg_female_pct": s["female_participation_pct"] / n["female_participation_pct"]
+            if n["female_participation_pct"] else None,
+            "avg_youth_pct": s["youth_participation_pct"] / n["youth_participation_pct"]
+            if n["youth_participation_pct"] else None,
+            "company_count": len(self._contrib),
+        }
+
+    def __getitem__(self, key: str):
+        return self.as_dict()[key]
+
+    def __iter__(self):
+        return iter(self.as_dict())
+
+    def __len__(self) -> int:
+        return len(self.as_dict())
+
+
+@tracing.traced("data")
+def compute_aggregates(store: MetricStore, as_of: str | None = None) -> dict:
+    """Compute portfolio-level aggregate metrics from the latest snapshot of each company.
+
+    Also accepts a sqlite_source.SQLiteSource, which computes the same figures in SQL.
+    """
+    if not isinstance(store, MetricStore):
+        return store.aggregates(as_of=as_of)
+    return PortfolioAggregates.from_store(store, as_of).as_dict()
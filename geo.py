@@ -0,0 +1,147 @@
+"""Map pipeline: deterministic company placement and zoom-level grid clustering.
+
+Companies are placed around their country's centroid on a sunflower spiral,
+ordered by a stable hash of the company id, so a company keeps its position
+across loads and other companies joining the portfolio only shift it slightly.
+For large portfolios, points are binned into a lat/lon grid whose cell size
+halves with each zoom level; each cluster carries its member count,
+beneficiary total and weighted centroid. Everything is vectorized over the store.
+"""
+
+import weakref
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from store import MetricStore
+
+# Approximate country centroids (lat, lon)
+COUNTRY_COORDS = {
+    "Algeria": (28.03, 1.66),
+    "Angola": (-11.20, 17.87),
+    "Benin": (9.31, 2.32),
+    "Botswana": (-22.33, 24.68),
+    "Burkina Faso": (12.24, -1.56),
+    "Burundi": (-3.37, 29.92),
+    "Cameroon": (7.37, 12.35),
+    "Chad": (15.45, 18.73),
+    "Côte d'Ivoire": (7.54, -5.55),
+    "DR Congo": (-4.04, 21.76),
+    "Egypt": (26.82, 30.80),
+    "Ethiopia": (9.15, 40.49),
+    "Gabon": (-0.80, 11.61),
+    "Gambia": (13.44, -15.31),
+    "Ghana": (7.95, -1.02),
+    "Guinea": (9.95, -9.70),
+    "Kenya": (-0.02, 37.91),
+    "Liberia": (6.43, -9.43),
+    "Madagascar": (-18.77, 46.87),
+    "Malawi": (-13.25, 34.30),
+    "Mali": (17.57, -4.00),
+    "Morocco": (31.79, -7.09),
+    "Mozambique": (-18.67, 35.53),
+    "Namibia": (-22.96, 18.49),
+    "Niger": (17.61, 8.08),
+    "Nigeria": (9.08, 7.49),
+    "Rwanda": (-1.94, 29.87),
+    "Senegal": (14.50, -14.45),
+    "Sierra Leone": (8.46, -11.78),
+    "South Africa": (-30.56, 22.94),
+    "Tanzania": (-6.37, 34.89),
+    "Togo": (8.62, 0.82),
+    "Tunisia": (33.89, 9.54),
+    "Uganda": (1.37, 32.29),
+    "Zambia": (-13.13, 27.85),
+    "Zimbabwe": (-19.02, 29.15),
+}
+
+# Radius (degrees) of the spiral companies in one country are spread over
+COUNTRY_SPREAD_DEG = 1.5
+# Grid cell size at zoom 0; each zoom level halves it
+BASE_CELL_DEG = 8.0
+MAX_ZOOM = 6
+# Above this many located companies the page switches to clustered markers
+DETAIL_MAX_POINTS = 50
+MAX_CLUSTERS = 300
+
+_GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+
+@dataclass(frozen=True)
+class Clusters:
+    lats: np.ndarray
+    lons: np.ndarray
+    counts: np.ndarray
+    beneficiaries: np.ndarray
+    first: np.ndarray  # row of one member per cluster, for labelling singletons
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+_layouts: "weakref.WeakKeyDictionary[MetricStore, tuple[np.ndarray, np.ndarray]]" = weakref.WeakKeyDictionary()
+
+
+def company_positions(store: MetricStore) -> tuple[np.ndarray, np.ndarray]:
+    """(lats, lons) per company row, NaN for countries without coordinates. Cached per store."""
+    if store not in _layouts:
+        _layouts[store] = _layout(store.meta["id"], store.meta["country"])
+    return _layouts[store]
+
+
+def _layout(ids: list[str], countries: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    names, country_idx = np.unique(np.asarray(countries, dtype=object), return_inverse=True)
+    centers = np.array([COUNTRY_COORDS.get(c, (np.nan, np.nan)) for c in names]).reshape(-1, 2)
+    hashes = np.fromiter((zlib.crc32(i.encode()) for i in ids), dtype=np.int64, count=len(ids))
+
+    # Rank within country by id hash: sort by (country, hash), then subtract group starts
+    order = np.lexsort((hashes, country_idx))
+    group_sizes = np.bincount(country_idx, minlength=len(names))
+    group_starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+    rank = np.empty(len(ids), dtype=np.int64)
+    rank[order] = np.arange(len(ids)) - group_starts[country_idx[order]]
+
+    n = group_sizes[country_idx]
+    radius = np.where(n > 1, COUNTRY_SPREAD_DEG * np.sqrt((rank + 0.5) / n), 0.0)
+    theta = rank * _GOLDEN_ANGLE
+    lats = centers[country_idx, 0] + radius * np.sin(theta)
+    lons = centers[country_idx, 1] + radius * np.cos(theta)
+    return lats, lons
+
+
+def cluster(lats: np.ndarray, lons: np.ndarray, beneficiaries: np.ndarray, zoom: int) -> Clusters:
+    """Bin located points into grid cells of BASE_CELL_DEG / 2**zoom degrees.
+
+    A cluster sits at the beneficiary-weighted centroid of its points, or at
+    their plain mean when none of them reports beneficiaries.
+    """
+    located = np.flatnonzero(~np.isnan(lats))
+    cell = BASE_CELL_DEG / 2 ** zoom
+    keys = np.stack([np.floor(lats[located] / cell), np.floor(lons[located] / cell)], axis=1)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    counts = np.bincount(inverse)
+    weights = np.nan_to_num(beneficiaries[located])
+    totals = np.bincount(inverse, weights)
+    unweighted = totals[inverse] <= 0
+    weights = np.where(unweighted, 1.0, weights)
+    norm = np.bincount(inverse, weights)
+    return Clusters(
+        lats=np.bincount(inverse, lats[located] * weights) / norm,
+        lons=np.bincount(inverse, lons[located] * weights) / norm,
+        counts=counts,
+        beneficiaries=totals,
+        first=located[first],
+    )
+
+
+def auto_zoom(lats: np.ndarray, lons: np.ndarray, max_clusters: int = MAX_CLUSTERS) -> int:
+    """Finest zoom level whose grid yields at most ``max_clusters`` clusters."""
+    located = ~np.isnan(lats)
+    for zoom in range(MAX_ZOOM, 0, -1):
+        cell = BASE_CELL_DEG / 2 ** zoom
+        keys = np.stack([np.floor(lats[located] / cell), np.floor(lons[located] / cell)], axis=1)
+        if len(np.unique(keys, axis=0)) <= max_clusters:
+            return zoom
+    return 0
@@ -0,0 +1,253 @@
+"""Append-only ingest journal for quarterly submissions.
+
+A submission is a small JSON delta holding one company's snapshot for one quarter::
+
+    {"company_id": "koolboks", "snapshot": {"quarter": "Q1 2026", "impact": {...}, ...}}
+
+A company that is not in the portfolio yet also carries its record, without
+snapshots, as ``"company"``. submit() validates submissions against the
+compiled schema (see schema.py) and appends one line each to ``DATA_DIR/journal.jsonl``.
+The DatasetCache reads new journal lines on the next rerun and applies them to
+the loaded stores and aggregates, so nothing is reloaded. compact() folds the
+journal into the base partition files and starts a new journal holding only
+entries it could not place.
+
+    python ingest.py submit delta.json [...]
+    python ingest.py compact
+"""
+
+import fcntl
+import json
+import os
+import sys
+import textwrap
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+from config import DATA_DIR, DEFAULT_FUND
+from data_loader import iter_company_records
+from models import parse_quarter
+from partitions import Partition, read_manifest
+from schema import SchemaError, load_schema
+from store import MetricStore, with_snapshots
+
+JOURNAL_FILE = "journal.jsonl"
+_LOCK_FILE = "journal.lock"
+
+
+def _company_ids(partition: Partition) -> set[str]:
+    if partition.path.is_dir():
+        return {path.stem for path in partition.files()}
+    return {c["id"] for c in iter_company_records(partition.path)}
+
+
+def validate_submissions(submissions: Sequence[dict], data_dir: Path = DATA_DIR) -> list[str]:
+    """Problems with a batch of submissions, each prefixed with its JSON path; empty if valid.
+
+    Besides the schema, every submission must be applicable: its company is
+    in a partition or the journal, or it carries a ``"company"`` record for a
+    fund in the manifest.
+    """
+    schema = load_schema(data_dir / "kpi_targets.json")
+    validator = schema.validator()
+    partitions = read_manifest(data_dir)
+    funds = {p.fund for p in partitions}
+    known = set().union(*map(_company_ids, partitions))
+    known |= {e["company_id"] for e in read_journal(data_dir / JOURNAL_FILE)[0] if e.get("company")}
+    errors = []
+    for k, sub in enumerate(submissions):
+        path = f"$[{k}]"
+        if type(sub) is not dict:
+            errors.append(f"{path}: expected an object")
+            continue
+        if type(sub.get("company_id")) is not str:
+            errors.append(f"{path}.company_id: expected a string")
+        company = sub.get("company")
+        if company is not None:
+            if type(company) is not dict:
+                errors.append(f"{path}.company: expected an object")
+            else:
+                company_errors = schema.company_errors(company, f"{path}.company")
+                if company.get("id") != sub.get("company_id"):
+                    company_errors.append(f"{path}.company.id: does not match company_id")
+                fund = company.get("fund") or DEFAULT_FUND
+                if type(fund) is str and fund not in funds:
+                    company_errors.append(f"{path}.company.fund: fund {fund!r} is not in the manifest")
+                if not company_errors:
+                    known.add(sub["company_id"])
+                errors += company_errors
+        elif type(sub.get("company_id")) is str and sub["company_id"] not in known:
+            errors.append(f"{path}.company_id: unknown company {sub['company_id']!r} (a new company needs a \"company\" record)")
+        validator.add_snapshot(sub.get("snapshot"), f"{path}.snapshot")
+    return errors + validator.errors()
+
+
+@contextmanager
+def _journal_lock(data_dir: Path) -> Iterator[None]:
+    """Exclusive lock shared by submitting and compacting processes."""
+    with (data_dir / _LOCK_FILE).open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def submit(submissions: Sequence[dict], data_dir: Path = DATA_DIR) -> int:
+    """Validate submissions and append them to the journal; all or none are appended."""
+    with _journal_lock(data_dir):
+        # Under the lock, so companies added by concurrent submissions are known
+        errors = validate_submissions(submissions, data_dir)
+        if errors:
+            raise SchemaError("submission", errors)
+        received = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        lines = "".join(
+            json.dumps({"received": received, **{k: sub[k] for k in ("company_id", "company", "snapshot") if k in sub}}) + "\n"
+            for sub in submissions
+        )
+        with (data_dir / JOURNAL_FILE).open("a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+    return len(submissions)
+
+
+def read_journal(path: Path, offset: int = 0) -> tuple[list[dict], int]:
+    """Entries after byte ``offset`` and the offset after the last complete line.
+
+    A line still being written (no trailing newline yet) is left for the next read.
+    """
+    try:
+        with path.open("rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = data.rfind(b"\n") + 1
+    return [json.loads(line) for line in data[:end].splitlines() if line.strip()], offset + end
+
+
+def apply_entries(store: MetricStore, entries: Iterable[dict], fund: str) -> tuple[MetricStore, list[int]]:
+    """Apply the entries that belong to a fund's store; returns the new store and their positions.
+
+    An entry belongs to the store if its company is in it, or if it adds a
+    new company of this fund.
+    """
+    known = set(store.company_index)
+    companies, snapshots, applied = [], [], []
+    for k, entry in enumerate(entries):
+        cid = entry["company_id"]
+        if cid not in known:
+            company = entry.get("company")
+            if company is None or (company.get("fund") or DEFAULT_FUND) != fund:
+                continue
+            companies.append({**company, "fund": fund})
+            known.add(cid)
+        snapshots.append((cid, entry["snapshot"]))
+        applied.append(k)
+    if not applied:
+        return store, []
+    return with_snapshots(store, companies, snapshots), applied
+
+
+def _merge_snapshot(record: dict, snapshot: dict) -> None:
+    """Replace or insert a snapshot in a raw company record, keeping quarter order."""
+    key = parse_quarter(snapshot["quarter"])
+    kept = [s for s in record.get("snapshots", []) if parse_quarter(s["quarter"]) != key]
+    record["snapshots"] = sorted([*kept, snapshot], key=lambda s: parse_quarter(s["quarter"]))
+
+
+def _fold(partition: Partition, entries: list[dict]) -> list[dict]:
+    """Write the entries that belong to a partition into its files; returns the rest."""
+    def claims(entry: dict, known: set[str]) -> bool:
+        company = entry.get("company")
+        return entry["company_id"] in known or (
+            company is not None and (company.get("fund") or DEFAULT_FUND) == partition.fund
+        )
+
+    if partition.path.is_dir():
+        known = _company_ids(partition)
+        pending = []
+        for entry in entries:
+            if not claims(entry, known):
+                pending.append(entry)
+                continue
+            path = partition.path / f"{entry['company_id']}.json"
+            known.add(entry["company_id"])
+            record = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {**entry["company"], "snapshots": []}
+            _merge_snapshot(record, entry["snapshot"])
+            tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+            tmp.write_text(json.dumps(record, indent=2), encoding="utf-8")
+            os.replace(tmp, path)
+        return pending
+
+    # Stream the partition file into a new one, merging entries company by company
+    known = _company_ids(partition)
+    mine = []
+    pending = []
+    for entry in entries:
+        if claims(entry, known):
+            mine.append(entry)
+            known.add(entry["company_id"])
+        else:
+            pending.append(entry)
+    if not mine:
+        return pending
+
+    by_company: dict[str, list[dict]] = {}
+    for entry in mine:
+        by_company.setdefault(entry["company_id"], []).append(entry)
+    # Written in json.dump(indent=2) layout, one company at a time
+    tmp = partition.path.with_name(f"{partition.path.name}.tmp-{os.getpid()}")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write('{\n  "companies": [\n')
+        n = 0
+
+        def write(record: dict) -> None:
+            nonlocal n
+            f.write((",\n" if n else "") + textwrap.indent(json.dumps(record, indent=2), "    "))
+            n += 1
+
+        for record in iter_company_records(partition.path):
+            for entry in by_company.pop(record["id"], []):
+                _merge_snapshot(record, entry["snapshot"])
+            write(record)
+        for company_entries in by_company.values():
+            record = {**company_entries[0]["company"], "snapshots": []}
+            for entry in company_entries:
+                _merge_snapshot(record, entry["snapshot"])
+            write(record)
+        f.write("\n  ]\n}\n")
+    os.replace(tmp, partition.path)
+    return pending
+
+
+def compact(data_dir: Path = DATA_DIR) -> int:
+    """Fold journal entries into the base partition files; returns how many were folded."""
+    journal = data_dir / JOURNAL_FILE
+    with _journal_lock(data_dir):
+        entries, _ = read_journal(journal)
+        pending = entries
+        for partition in read_manifest(data_dir):
+            pending = _fold(partition, pending)
+        # Start a new journal file, so readers see it was replaced rather than appended to
+        tmp = journal.with_name(f"{journal.name}.tmp-{os.getpid()}")
+        tmp.write_text("".join(json.dumps(e) + "\n" for e in pending), encoding="utf-8")
+        os.replace(tmp, journal)
+    return len(entries) - len(pending)
+
+
+if __name__ == "__main__":
+    command, *args = sys.argv[1:] or ["help"]
+    if command == "submit" and args:
+        subs = []
+        for arg in args:
+            loaded = json.loads(Path(arg).read_text(encoding="utf-8"))
+            subs.extend(loaded if isinstance(loaded, list) else [loaded])
+        print(f"Appended {submit(subs)} submissions to {DATA_DIR / JOURNAL_FILE}")
+    elif command == "compact":
+        print(f"Folded {compact()} journal entries into {DATA_DIR}")
+    else:
+        print(__doc__)
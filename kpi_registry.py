@@ -0,0 +1,115 @@
+"""KPI registry: ready-to-render KPI rows driven by data/kpi_targets.json.
+
+The "views" section of kpi_targets.json lists, per page, which metrics to
+show with their labels and formats. The "targets" section supplies the
+traffic-light targets. Rows for every company are computed in one vectorized
+pass per (view, as-of quarter) and cached on the registry, which belongs to
+a single dataset version. Pages only look rows up.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+import tracing
+from components.formatting import format_number
+from config import STATUS_CODES, GREEN, YELLOW, GREY, evaluate_status_batch
+from store import METRIC_INDEX, MetricStore
+
+
+@dataclass(frozen=True)
+class KPIDefinition:
+    metric: str
+    label: str
+    format: str  # str.format template, or "compact" for format_number
+
+    def render(self, value: float) -> str:
+        return format_number(value) if self.format == "compact" else self.format.format(value)
+
+
+def _default_format(metric: str) -> str:
+    return "{:.0f}%" if metric.endswith("_pct") else "compact"
+
+
+def _capacity_utilization(latest: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Daily production capacity as % of target; under 50% is a watch, never red."""
+    capacity = latest[:, METRIC_INDEX["daily_production_capacity"]]
+    target = latest[:, METRIC_INDEX["daily_production_target"]]
+    has_target = ~np.isnan(target) & (target != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(has_target, capacity / np.where(has_target, target, 1.0) * 100, np.nan)
+    codes = np.where(utilization < 50, YELLOW, GREEN).astype(np.int8)
+    codes[np.isnan(utilization)] = GREY
+    return utilization, codes
+
+
+# Metrics derived from others, each with its own status rule:
+# name -> f(latest (company, metric) values) -> (values, status codes)
+DERIVED_METRICS = {
+    "capacity_utilization_pct": _capacity_utilization,
+}
+
+
+class KPIRegistry:
+    """Precomputed (label, value, status) KPI rows per view, company and quarter."""
+
+    def __init__(self, store: MetricStore, kpi_config: dict):
+        self.store = store
+        self.targets = {
+            key: (t["target"], t["higher_is_better"]) for key, t in kpi_config["targets"].items()
+        }
+        self.views = {
+            view: [
+                KPIDefinition(e["metric"], e["label"], e.get("format") or _default_format(e["metric"]))
+                for e in entries
+            ]
+            for view, entries in kpi_config.get("views", {}).items()
+        }
+        self._rows: dict[tuple[str, int], list[list[tuple[str, str, str]]]] = {}
+        self._worst: dict[tuple[str, int, int | None], np.ndarray] = {}
+
+    def rows(self, view: str, company: int | str, as_of: str | None = None) -> list[tuple[str, str, str]]:
+        """KPI rows (label, formatted value, status) a company has data for, in view order."""
+        return self._view_rows(view, as_of)[self.store.position(company)]
+
+    def worst_status(self, view: str, as_of: str | None = None, limit: int | None = None) -> np.ndarray:
+        """Per company, the worst status code among its first ``limit`` rows (GREY if none)."""
+        key = (view, self.store.quarter_position(as_of), limit)
+        if key not in self._worst:
+            rank = {name: code for code, name in enumerate(STATUS_CODES)}
+            self._worst[key] = np.array(
+                [max((rank[status] for _, _, status in r[:limit]), default=GREY)
+                 for r in self._view_rows(view, as_of)],
+                dtype=np.int8,
+            )
+        return self._worst[key]
+
+    def _view_rows(self, view: str, as_of: str | None) -> list[list[tuple[str, str, str]]]:
+        key = (view, self.store.quarter_position(as_of))
+        if key not in self._rows:
+            self._rows[key] = self._compute(view, as_of)
+        return self._rows[key]
+
+    @tracing.traced("kpi")
+    def _compute(self, view: str, as_of: str | None) -> list[list[tuple[str, str, str]]]:
+        defs = self.views[view]
+        latest = self.store.latest_values(as_of)
+        values = np.full((len(self.store), len(defs)), np.nan)
+        for j, d in enumerate(defs):
+            if d.metric not in DERIVED_METRICS:
+                values[:, j] = latest[:, METRIC_INDEX[d.metric]]
+
+        codes = evaluate_status_batch([d.metric for d in defs], values, self.targets)
+        for j, d in enumerate(defs):
+            if d.metric in DERIVED_METRICS:
+                values[:, j], codes[:, j] = DERIVED_METRICS[d.metric](latest)
+
+        return [
+            [
+                (d.label, d.render(v), STATUS_CODES[c])
+                for d, v, c in zip(defs, value_row, code_row)
+                if not math.isnan(v)
+            ]
+            for value_row, code_row in zip(values.tolist(), codes.tolist())
+        ]
@@ -0,0 +1,114 @@
+"""Memory report: the shared dataset's footprint and each session's own overhead.
+
+The Dataset is loaded once per process and shared read-only by every
+session, so it is measured once. A session's overhead is the deep size of
+its session state, not counting anything reachable only through the shared
+dataset (the store, aggregates, KPI registry and data source).
+"""
+
+import sys
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+import numpy as np
+
+from data_cache import Dataset
+
+
+@dataclass
+class DatasetFootprint:
+    array_bytes: int         # in-memory cube arrays (memory-mapped arrays count as 0)
+    mapped_bytes: int        # cube arrays backed by a memory-mapped snapshot file
+    object_bytes: int        # materialized companies, snapshots and cached aggregates
+    companies_materialized: int
+    snapshots_materialized: int
+
+    @property
+    def total_bytes(self) -> int:
+        return self.array_bytes + self.object_bytes
+
+
+def deep_sizeof(obj, skip: Iterable[int] = ()) -> int:
+    """Approximate deep size of ``obj`` in bytes, not descending into ids in ``skip``.
+
+    NumPy arrays count their buffer once, memory-mapped arrays count only
+    their header, and modules, classes and functions are never followed.
+    """
+    seen = set(skip)
+    stack = [obj]
+    total = 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, np.ndarray):
+            # getsizeof already includes an owned buffer; a view counts its base once
+            if o.base is not None and not isinstance(o, np.memmap):
+                stack.append(o.base)
+            continue
+        if isinstance(o, (str, bytes, int, float, bool)) or o is None:
+            continue
+        if isinstance(o, Mapping):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        if hasattr(o, "__dict__"):
+            stack.append(vars(o))
+        for name in getattr(type(o), "__slots__", ()):
+            if hasattr(o, name):
+                stack.append(getattr(o, name))
+    return total
+
+
+def shared_ids(dataset: Dataset, *others) -> set[int]:
+    """Ids of the shared objects a session may reference but does not own."""
+    return {id(o) for o in (dataset, dataset.store, dataset.aggregates, dataset.kpis,
+                            dataset.kpi_config, *others)}
+
+
+def dataset_footprint(dataset: Dataset) -> DatasetFootprint:
+    """Measure the shared dataset once: cube arrays plus lazily materialized objects."""
+    store = dataset.store
+    array_bytes = mapped_bytes = 0
+    for arr in (store.values, store.mask, store.present, store.synthetic, store.asof):
+        if isinstance(arr, np.memmap) or isinstance(arr.base, np.memmap):
+            mapped_bytes += arr.nbytes
+        else:
+            array_bytes += arr.nbytes
+    caches = (store._companies, store._snapshots, store._latest_status, store._status,
+              dataset._aggregates_as_of, dataset.aggregates, dataset.kpis._rows)
+    return DatasetFootprint(
+        array_bytes=array_bytes,
+        mapped_bytes=mapped_bytes,
+        object_bytes=deep_sizeof(caches, skip={id(store)}),
+        companies_materialized=len(store._companies),
+        snapshots_materialized=len(store._snapshots),
+    )
+
+
+def session_overhead(state: Mapping, shared: set[int]) -> int:
+    """Bytes held by one session's state beyond references to shared objects."""
+    return deep_sizeof(dict(state), skip=shared)
+
+
+def active_session_states() -> list[tuple[str, Mapping]]:
+    """(session id, state) for every live Streamlit session in this process.
+
+    Uses Streamlit runtime internals; falls back to the current session only
+    when they are unavailable.
+    """
+    import streamlit as st
+
+    try:
+        from streamlit.runtime import Runtime
+
+        sessions = Runtime.instance()._session_mgr.list_active_sessions()
+        return [
+            (info.session.id, info.session.session_state.filtered_state)
+            for info in sessions
+        ]
+    except Exception:
+        return [("current", st.session_state.to_dict())]
@@ -1,9 +1,28 @@
 """Data models for the PE Portfolio Monitoring Dashboard."""
 
+import re
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
+from config import DEFAULT_FUND
+
+_QUARTER_RE = re.compile(r"^Q([1-4])\s+(\d{4})$")
+
+
+def parse_quarter(label: str) -> int:
+    """Parse a quarter label like "Q4 2025" into a sortable integer period key."""
+    m = _QUARTER_RE.match(label.strip())
+    if not m:
+        raise ValueError(f"Invalid quarter label: {label!r}")
+    return int(m.group(2)) * 4 + int(m.group(1)) - 1
+
+
+def format_quarter(key: int) -> str:
+    """Inverse of parse_quarter: turn a period key back into a "Q4 2025" label."""
+    year, q = divmod(key, 4)
+    return f"Q{q + 1} {year}"
+
 
 class Sector(str, Enum):
     AGRITECH = "Agritech"
@@ -20,7 +39,9 @@ class KPIStatus(str, Enum):
     GREY = "grey"
 
 
-@dataclass
+# Metric records and snapshots are slotted: no per-instance __dict__, which
+# matters when the full history is materialized and most fields are None.
+@dataclass(slots=True)
 class ImpactMetrics:
     female_participation_pct: Optional[float] = None
     youth_participation_pct: Optional[float] = None
@@ -31,7 +52,7 @@ class ImpactMetrics:
     female_leadership_pct: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FinancialMetrics:
     total_funding_usd: Optional[float] = None
     revenue_estimate_usd: Optional[float] = None
@@ -40,7 +61,7 @@ class FinancialMetrics:
     default_rate_pct: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class OperationalMetrics:
     registered_users: Optional[int] = None
     active_users: Optional[int] = None
@@ -58,7 +79,7 @@ class OperationalMetrics:
     countries_operating: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class QuarterlySnapshot:
     quarter: str  # e.g. "Q4 2025"
     is_synthetic: bool = False
@@ -77,7 +98,11 @@ class PortfolioCompany:
     founded_year: int
     description: str
     snapshots: list[QuarterlySnapshot] = field(default_factory=list)
+    sdg_mask: int = 0  # bit g - 1 set when aligned with SDG g (see sdg.py)
+    fund: str = DEFAULT_FUND
 
     @property
     def latest(self) -> Optional[QuarterlySnapshot]:
-        return self.snapshots[-1] if self.snapshots else None
+        if not self.snapshots:
+            return None
+        return max(self.snapshots, key=lambda s: parse_quarter(s.quarter))
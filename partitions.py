@@ -0,0 +1,104 @@
+"""Partitioned multi-fund data layout.
+
+``DATA_DIR/manifest.json`` lists the funds and where each one's companies live::
+
+    {"funds": [{"name": "Fund IV", "path": "funds/fund-iv.json"},
+               {"name": "Fund V", "path": "funds/fund-v"}]}
+
+A partition path is either a JSON file shaped like portfolio_companies.json or
+a directory with one JSON file per company. Every company in a partition
+belongs to that fund. Without a manifest, portfolio_companies.json is the only
+partition, and it belongs to DEFAULT_FUND. Partitions are loaded and cached
+independently (see DatasetCache), so viewing one fund never loads the others.
+
+Split a single portfolio file into this layout with::
+
+    python partitions.py [source.json] [out_dir]
+"""
+
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import tracing
+from config import DATA_DIR, DEFAULT_FUND
+from data_loader import iter_company_records
+from snapshot import load_store_fast
+from schema import load_schema
+from store import MetricStore
+
+MANIFEST_FILE = "manifest.json"
+COMPANIES_FILE = "portfolio_companies.json"
+
+
+@dataclass(frozen=True)
+class Partition:
+    fund: str
+    path: Path
+
+    @property
+    def slug(self) -> str:
+        return re.sub(r"[^a-z0-9]+", "-", self.fund.lower()).strip("-")
+
+    def files(self) -> list[Path]:
+        """The data files making up the partition, in load order."""
+        return sorted(self.path.glob("*.json")) if self.path.is_dir() else [self.path]
+
+
+def read_manifest(data_dir: Path = DATA_DIR) -> list[Partition]:
+    """The partitions listed in the manifest, or the single-file layout without one."""
+    manifest = data_dir / MANIFEST_FILE
+    if not manifest.exists():
+        return [Partition(DEFAULT_FUND, data_dir / COMPANIES_FILE)]
+    funds = json.loads(manifest.read_text(encoding="utf-8"))["funds"]
+    partitions = [Partition(f["name"], data_dir / f["path"]) for f in funds]
+    names = [p.fund for p in partitions]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{manifest}: duplicate fund names")
+    return partitions
+
+
+@tracing.traced("data")
+def load_partition(partition: Partition, compiled_dir: Path) -> MetricStore:
+    """Load one fund's companies into a store.
+
+    File partitions use their compiled snapshot in ``compiled_dir`` while it is fresh.
+    """
+    if partition.path.is_dir():
+        validator = load_schema().validator()
+        for path in partition.files():
+            validator.add({**json.loads(path.read_text(encoding="utf-8")), "fund": partition.fund}, f"{path.name}: $")
+        return validator.build(str(partition.path))
+
+    store = load_store_fast(partition.path, compiled_dir)
+    if any(f != partition.fund for f in store.meta["fund"]):
+        meta = {**store.meta, "fund": [partition.fund] * len(store)}
+        store = MetricStore(meta, store.quarters, store.values, store.present, store.synthetic, store.mask)
+    return store
+
+
+def split_portfolio(source: Path, out_dir: Path) -> Path:
+    """Write ``source`` as a partitioned layout: one directory per fund, one file per company."""
+    funds: list[str] = []
+    for c in iter_company_records(source):
+        fund = c.get("fund") or DEFAULT_FUND
+        fund_dir = out_dir / "funds" / Partition(fund, out_dir).slug
+        if fund not in funds:
+            fund_dir.mkdir(parents=True, exist_ok=True)
+            funds.append(fund)
+        (fund_dir / f"{c['id']}.json").write_text(json.dumps(c, indent=2), encoding="utf-8")
+    manifest = {
+        "funds": [
+            {"name": fund, "path": f"funds/{Partition(fund, out_dir).slug}"} for fund in funds
+        ],
+    }
+    (out_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return out_dir / MANIFEST_FILE
+
+
+if __name__ == "__main__":
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_DIR / COMPANIES_FILE
+    dest = Path(sys.argv[2]) if len(sys.argv) > 2 else src.parent
+    print(f"Wrote {split_portfolio(src, dest)}")
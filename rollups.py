@@ -0,0 +1,164 @@
+"""Materialized group-by aggregates over sector × country × fund × quarter.
+
+The finest table has one group per (sector, country, fund) cell that occurs
+in the data. It holds, per quarter and metric, the sum and count of each
+company's latest value as of that quarter, the beneficiary-weighted sum and
+weight, and the number of companies reporting by then. Coarser tables
+(by sector, by country within a fund, the whole portfolio, ...) are
+summed from the cell table on first request and cached. Any aggregate is then
+a division over a few small arrays, so drill-down queries never touch
+per-company data. Built once per dataset version (see Dataset.rollups).
+"""
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from store import METRIC_INDEX, MetricStore
+
+DIMENSIONS = ("sector", "country", "fund")
+AGGREGATIONS = ("sum", "mean", "weighted_mean", "count", "coverage")
+
+# Weighted means weight each company's value by its beneficiaries
+WEIGHT_METRIC = "total_beneficiaries"
+
+
+def _sum_by(groups: np.ndarray, arr: np.ndarray) -> np.ndarray:
+    """Sum rows of ``arr`` per group id; ids must be 0..n-1 with every group non-empty."""
+    if not len(groups):
+        return np.zeros((0, *arr.shape[1:]), dtype=arr.dtype)
+    order = np.argsort(groups, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+    return np.add.reduceat(arr[order], starts, axis=0)
+
+
+@dataclass(frozen=True)
+class RollupTable:
+    """Aggregates for one combination of dimensions; arrays are (group, quarter[, metric])."""
+    by: tuple[str, ...]
+    keys: list[tuple[str, ...]]
+    companies: np.ndarray  # companies with a snapshot as of each quarter
+    sums: np.ndarray
+    counts: np.ndarray     # companies with a value for the metric
+    weighted: np.ndarray   # sum of value × weight where both are known
+    weights: np.ndarray    # sum of weight where both are known
+
+    def aggregate(self, metric: str, agg: str) -> np.ndarray:
+        """(group, quarter) values of one aggregate; NaN where nothing was reported."""
+        m = METRIC_INDEX[metric]
+        out = np.full(self.companies.shape, np.nan)
+        if agg == "sum":
+            np.copyto(out, self.sums[:, :, m], where=self.counts[:, :, m] > 0)
+        elif agg == "count":
+            return self.counts[:, :, m].astype(float)
+        elif agg == "mean":
+            np.divide(self.sums[:, :, m], self.counts[:, :, m], out=out, where=self.counts[:, :, m] > 0)
+        elif agg == "weighted_mean":
+            np.divide(self.weighted[:, :, m], self.weights[:, :, m], out=out, where=self.weights[:, :, m] > 0)
+        elif agg == "coverage":
+            np.divide(self.counts[:, :, m], self.companies, out=out, where=self.companies > 0)
+        else:
+            raise ValueError(f"Unknown aggregation: {agg!r} (expected one of {AGGREGATIONS})")
+        return out
+
+
+class Rollups:
+    """Group-by tables over one store, materialized on first use and shared by all sessions."""
+
+    def __init__(self, store: MetricStore):
+        self.store = store
+        self.labels: dict[str, list[str]] = {}
+        codes = []
+        for dim in DIMENSIONS:
+            raw = np.asarray([getattr(v, "value", v) for v in store.meta[dim]], dtype=object)
+            labels, inverse = np.unique(raw, return_inverse=True)
+            self.labels[dim] = labels.tolist()
+            codes.append(inverse.ravel())
+        self._cells, cell_of = np.unique(
+            np.stack(codes, axis=1).reshape(len(store), len(DIMENSIONS)), axis=0, return_inverse=True,
+        )
+        cell_of = cell_of.ravel()
+
+        # Each company's latest values as of every quarter, so rollups match the as-of headline
+        asof = store.asof
+        latest = store.values[np.arange(len(store))[:, None], np.maximum(asof, 0)]
+        latest[asof < 0] = np.nan
+        known = ~np.isnan(latest)
+        weight = latest[:, :, METRIC_INDEX[WEIGHT_METRIC], None]
+        both = known & ~np.isnan(weight)
+        filled = np.where(known, latest, 0.0)
+        self._base = RollupTable(
+            by=DIMENSIONS,
+            keys=self._keys(DIMENSIONS, self._cells),
+            companies=_sum_by(cell_of, (asof >= 0).astype(np.int64)),
+            sums=_sum_by(cell_of, filled),
+            counts=_sum_by(cell_of, known.astype(np.int64)),
+            weighted=_sum_by(cell_of, np.where(both, filled * weight, 0.0)),
+            weights=_sum_by(cell_of, np.where(both, weight, 0.0)),
+        )
+        self._tables: dict[tuple[str, ...], RollupTable] = {DIMENSIONS: self._base}
+        self._lock = threading.Lock()
+
+    def _keys(self, by: tuple[str, ...], codes: np.ndarray) -> list[tuple[str, ...]]:
+        return [tuple(self.labels[dim][c] for dim, c in zip(by, row)) for row in codes.tolist()]
+
+    def table(self, by: tuple[str, ...]) -> RollupTable:
+        """Aggregates grouped by ``by`` (any subset of DIMENSIONS, in any order; () is the portfolio)."""
+        by = tuple(by)
+        unknown = set(by) - set(DIMENSIONS)
+        if unknown or len(set(by)) != len(by):
+            raise ValueError(f"Invalid rollup dimensions: {by!r} (expected a subset of {DIMENSIONS})")
+        with self._lock:
+            if by not in self._tables:
+                cols = self._cells[:, [DIMENSIONS.index(dim) for dim in by]]
+                codes, groups = np.unique(cols, axis=0, return_inverse=True)
+                groups = groups.ravel()
+                base = self._base
+                self._tables[by] = RollupTable(
+                    by=by,
+                    keys=self._keys(by, codes),
+                    companies=_sum_by(groups, base.companies),
+                    sums=_sum_by(groups, base.sums),
+                    counts=_sum_by(groups, base.counts),
+                    weighted=_sum_by(groups, base.weighted),
+                    weights=_sum_by(groups, base.weights),
+                )
+            return self._tables[by]
+
+    def _select(self, by: tuple[str, ...], where: dict[str, str] | None) -> tuple[RollupTable, list[int]]:
+        """The table for ``where`` dimensions + ``by``, and its rows matching ``where``."""
+        where = where or {}
+        table = self.table((*where, *by))
+        wanted = tuple(where.values())
+        rows = [i for i, key in enumerate(table.keys) if key[:len(wanted)] == wanted]
+        return table, rows
+
+    def query(self, metric: str, by: tuple[str, ...] = ("sector",), agg: str = "sum",
+              as_of: str | None = None, where: dict[str, str] | None = None) -> dict[tuple[str, ...], float]:
+        """``agg`` of ``metric`` per group of ``by`` as of a quarter, within the ``where`` filter.
+
+        Keys are tuples of ``by`` labels, sorted. ``where`` drills down, e.g.
+        ``query("direct_jobs", ("country",), where={"sector": "Agritech"})``.
+        """
+        table, rows = self._select(by, where)
+        q = self.store.quarter_position(as_of)
+        if q < 0:
+            return {table.keys[i][len(table.by) - len(by):]: np.nan for i in rows}
+        values = table.aggregate(metric, agg)[:, q]
+        return {table.keys[i][len(table.by) - len(by):]: float(values[i]) for i in rows}
+
+    def companies(self, by: tuple[str, ...] = ("sector",), as_of: str | None = None,
+                  where: dict[str, str] | None = None) -> dict[tuple[str, ...], int]:
+        """Companies with a snapshot as of a quarter, per group."""
+        table, rows = self._select(by, where)
+        q = self.store.quarter_position(as_of)
+        return {table.keys[i][len(table.by) - len(by):]: int(table.companies[i, q]) if q >= 0 else 0
+                for i in rows}
+
+    def series(self, metric: str, agg: str = "sum", where: dict[str, str] | None = None) -> np.ndarray:
+        """``agg`` of ``metric`` over the quarter axis for one group (the portfolio if no filter)."""
+        table, rows = self._select((), where)
+        if not rows:
+            return np.full(len(self.store.quarters), np.nan)
+        return table.aggregate(metric, agg)[rows[0]]
@@ -0,0 +1,242 @@
+"""Batched schema validation for raw portfolio data.
+
+The schema is compiled from the models.py dataclasses and kpi_targets.json
+(again whenever that file changes) into per-metric arrays along the store's
+metric axis: whether a metric is an integer, and its allowed range. Counts
+and amounts are non-negative, and percentages lie in 0-100. A Validator feeds records
+to a StoreBuilder, which notes the raw values it cannot hold (unknown keys,
+values that are not numbers, bad quarters) as it goes. errors() then tests
+every value in the batch at once with NumPy, along with duplicate
+quarters. For valid data the extra work is a type check per record and per
+snapshot. JSON paths are built only for the values that fail.
+"""
+
+import json
+import math
+import typing
+from dataclasses import MISSING, dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from config import DATA_DIR
+from models import PortfolioCompany, Sector
+from sdg import SDG_NAMES
+from store import INT_METRICS, METRIC_BLOCK, METRICS, MetricStore, StoreBuilder
+
+# Errors listed in a SchemaError message; all of them are on its ``errors``
+MAX_REPORTED = 20
+
+_JSON_TYPES = {str: "a string", int: "an integer", float: "a number", list: "a list", bool: "a boolean"}
+
+
+class SchemaError(ValueError):
+    """Raised when data fails validation; ``errors`` lists every problem with its JSON path."""
+
+    def __init__(self, source: str, errors: list[str]):
+        self.errors = errors
+        shown = "\n".join(errors[:MAX_REPORTED])
+        more = f"\n... and {len(errors) - MAX_REPORTED} more" if len(errors) > MAX_REPORTED else ""
+        super().__init__(f"{source}: {len(errors)} schema errors\n{shown}{more}")
+
+
+def _base_type(hint) -> type:
+    """``int`` for ``Optional[int]``, the origin for ``list[...]``, else the hint itself."""
+    args = [a for a in typing.get_args(hint) if a is not type(None)]
+    if typing.get_origin(hint) is typing.Union and len(args) == 1:
+        return args[0]
+    return typing.get_origin(hint) or hint
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Validation rules compiled into arrays aligned with the store's metric axis."""
+    integer: np.ndarray  # bool per metric
+    low: np.ndarray
+    high: np.ndarray
+    company_fields: dict[str, type]  # required raw field -> JSON type
+    company_keys: frozenset[str]  # every field a raw company record may have
+
+    @classmethod
+    def compile(cls, kpi_config: dict | None = None) -> "Schema":
+        """Rules from the dataclass field types, plus the ``%`` units in kpi_targets.json."""
+        percent = {m for m in METRICS if m.endswith("_pct")}
+        percent |= {m for m, t in (kpi_config or {}).get("targets", {}).items() if t.get("unit") == "%"}
+        hints = typing.get_type_hints(PortfolioCompany)
+        company_fields = {}
+        for f in fields(PortfolioCompany):
+            if f.default is MISSING and f.default_factory is MISSING:
+                kind = _base_type(hints[f.name])
+                # Enums are stored as their values
+                company_fields[f.name] = str if issubclass(kind, str) else kind
+        return cls(
+            integer=np.array([m in INT_METRICS for m in METRICS]),
+            low=np.zeros(len(METRICS)),
+            high=np.array([100.0 if m in percent else np.inf for m in METRICS]),
+            company_fields=company_fields,
+            # Raw records list SDGs as "sdgs" (see sdg.py)
+            company_keys=frozenset({f.name for f in fields(PortfolioCompany)} | {"sdgs"}),
+        )
+
+    def company_errors(self, c: dict, path: str) -> list[str]:
+        """Problems with a raw company record's own fields (not its snapshots)."""
+        errors = [
+            f"{path}.{name}: expected {_JSON_TYPES[kind]}, " + ("missing" if name not in c else f"got {c[name]!r}")
+            for name, kind in self.company_fields.items() if type(c.get(name)) is not kind
+        ]
+        if type(c.get("sector")) is str and c["sector"] not in _SECTORS:
+            errors.append(f"{path}.sector: unknown sector {c['sector']!r}")
+        sdgs = c.get("sdgs", [])
+        if type(sdgs) is not list or not all(type(g) is int and g in SDG_NAMES for g in sdgs):
+            errors.append(f"{path}.sdgs: expected a list of SDG numbers 1-17, got {sdgs!r}")
+        mask = c.get("sdg_mask", 0)
+        if type(mask) is not int or not 0 <= mask < 1 << max(SDG_NAMES):
+            errors.append(f"{path}.sdg_mask: expected an SDG bitmask 0-{(1 << max(SDG_NAMES)) - 1}, got {mask!r}")
+        if type(c.get("fund", "")) is not str:
+            errors.append(f"{path}.fund: expected a string, got {c['fund']!r}")
+        if not c.keys() <= self.company_keys:
+            errors += [f"{path}.{key}: unknown field" for key in sorted(c.keys() - self.company_keys)]
+        return errors
+
+    def validator(self) -> "Validator":
+        return Validator(self)
+
+
+_SECTORS = frozenset(s.value for s in Sector)
+
+
+def load_schema(targets: Path = DATA_DIR / "kpi_targets.json") -> Schema:
+    """The schema for a KPI targets file, compiled again only when the file's mtime or size moves."""
+    try:
+        st = targets.stat()
+    except FileNotFoundError:
+        return _compile_schema(targets, None)
+    return _compile_schema(targets, (st.st_mtime_ns, st.st_size))
+
+
+@lru_cache(maxsize=8)
+def _compile_schema(targets: Path, stamp: tuple[int, int] | None) -> Schema:
+    return Schema.compile(json.loads(targets.read_text(encoding="utf-8")) if stamp is not None else None)
+
+
+class Validator:
+    """Validates raw records while a StoreBuilder takes them in, then all values at once."""
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self.builder = StoreBuilder(collect_rejected=True)
+        self._errors: list[str] = []
+        # JSON path per snapshot owner: builder companies count up from 0, and
+        # snapshots checked but not built count down from -1
+        self._paths: dict[int, str] = {}
+        self._bare: set[int] = set()  # owners that are a single snapshot
+        self._ids: dict[str, str] = {}
+        self._records = 0
+        self._unbuilt_count = 0
+
+    def add(self, c: dict, path: str | None = None) -> None:
+        """Check and add one company record shaped like an entry of portfolio_companies.json.
+
+        A record whose own fields are invalid is reported and left out of the
+        build; its snapshots are still checked.
+        """
+        path = path or f"$.companies[{self._records}]"
+        self._records += 1
+        if type(c) is not dict or type(c.get("snapshots")) is not list:
+            self._errors.append(f"{path}: expected a company object with a \"snapshots\" list")
+            return
+        errors = self.schema.company_errors(c, path)
+        cid = c.get("id")
+        if cid in self._ids:
+            errors.append(f"{path}.id: duplicate company id {cid!r} (first at {self._ids[cid]})")
+        if errors:
+            self._errors += errors
+            self.builder.add_snapshots(self._unbuilt(path), c["snapshots"])
+            return
+        self._ids[cid] = path
+        self._paths[len(self._ids) - 1] = path
+        self.builder.add(c)
+
+    def add_snapshot(self, s: dict, path: str) -> None:
+        """Check one snapshot on its own, such as an ingest submission's; it is not built."""
+        owner = self._unbuilt(path)
+        self._bare.add(owner)
+        self.builder.add_snapshots(owner, [s])
+
+    def _unbuilt(self, path: str) -> int:
+        self._unbuilt_count += 1
+        owner = -self._unbuilt_count
+        self._paths[owner] = path
+        return owner
+
+    def _path(self, owner: int, position: int) -> str:
+        return self._paths[owner] if owner in self._bare else f"{self._paths[owner]}.snapshots[{position}]"
+
+    def errors(self) -> list[str]:
+        """Every problem found, with its JSON path."""
+        errors = list(self._errors)
+        for owner, position, field, value, problem in self.builder.rejected:
+            path = self._path(owner, position)
+            if problem == "object":
+                errors.append(f"{path}: expected a snapshot object")
+            elif problem == "quarter":
+                errors.append(f"{path}.quarter: expected a label like \"Q4 2025\", got {value!r}")
+            elif problem == "unknown":
+                errors.append(f"{path}.{field}: unknown field")
+            elif problem == "finite":
+                errors.append(f"{path}.{field}: expected a finite number or null, got {value!r}")
+            elif field == "is_synthetic":
+                errors.append(f"{path}.is_synthetic: expected a boolean, got {value!r}")
+            else:
+                expected = "an integer" if field.split(".")[-1] in INT_METRICS else "a number"
+                errors.append(f"{path}.{field}: expected {expected} or null, got {value!r}")
+
+        company, position, quarter, rows = self.builder.snapshot_arrays()
+        errors += self._value_errors(company, position, rows)
+        # Snapshots with an invalid quarter are not built, but their values are still checked
+        errors += self._value_errors(*self.builder.unplaced_arrays())
+
+        # Duplicate quarters within a company
+        order = np.lexsort((np.arange(len(company)), quarter, company))
+        dup = (company[order[1:]] == company[order[:-1]]) & (quarter[order[1:]] == quarter[order[:-1]])
+        for first, s in zip(order[:-1][dup].tolist(), order[1:][dup].tolist()):
+            errors.append(
+                f"{self._path(company[s], position[s])}.quarter: duplicate quarter"
+                f" (also at {self._path(company[first], position[first])})"
+            )
+        return errors
+
+    def _value_errors(self, company: np.ndarray, position: np.ndarray, rows: np.ndarray) -> list[str]:
+        """Type and range problems in (snapshot, metric) rows, checked all at once."""
+        schema = self.schema
+        reported = ~np.isnan(rows)
+        finite = np.isfinite(rows)
+        bad = reported & (
+            ~finite
+            | (schema.integer & (rows != np.round(np.where(finite, rows, 0))))
+            | (rows < schema.low) | (rows > schema.high)
+        )
+        errors = []
+        for s, m in zip(*np.nonzero(bad)):
+            value = rows[s, m]
+            value = int(value) if schema.integer[m] and float(value).is_integer() else float(value)
+            path = f"{self._path(company[s], position[s])}.{METRIC_BLOCK[METRICS[m]]}.{METRICS[m]}"
+            if not math.isfinite(value) or (schema.integer[m] and not float(value).is_integer()):
+                errors.append(f"{path}: expected {'an integer' if schema.integer[m] else 'a finite number'}, got {value!r}")
+            else:
+                high = schema.high[m]
+                bounds = f"between {schema.low[m]:g} and {high:g}" if math.isfinite(high) else "non-negative"
+                errors.append(f"{path}: expected {bounds}, got {value!r}")
+        return errors
+
+    def check(self, source: str = "data") -> None:
+        """Raise SchemaError listing every problem, if there are any."""
+        errors = self.errors()
+        if errors:
+            raise SchemaError(source, errors)
+
+    def build(self, source: str = "data") -> MetricStore:
+        """The store of the added records; raises SchemaError if any were invalid."""
+        self.check(source)
+        return self.builder.build()
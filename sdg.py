@@ -0,0 +1,68 @@
+"""UN Sustainable Development Goal alignment as per-company bitmasks.
+
+Companies list the goals they align with as ``"sdgs": [1, 2, 5]`` in the data
+file. The store keeps one uint32 per company with bit ``g - 1`` set for goal g,
+so set queries and per-goal counts are vectorized bit operations.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+
+SDG_NAMES = {
+    1: "No Poverty",
+    2: "Zero Hunger",
+    3: "Good Health & Well-being",
+    4: "Quality Education",
+    5: "Gender Equality",
+    6: "Clean Water & Sanitation",
+    7: "Affordable & Clean Energy",
+    8: "Decent Work",
+    9: "Industry & Innovation",
+    10: "Reduced Inequalities",
+    11: "Sustainable Cities",
+    12: "Responsible Consumption",
+    13: "Climate Action",
+    14: "Life Below Water",
+    15: "Life on Land",
+    16: "Peace & Justice",
+    17: "Partnerships for the Goals",
+}
+GOALS = np.array(list(SDG_NAMES), dtype=np.uint32)
+
+
+def to_mask(goals: Iterable[int]) -> int:
+    """Bitmask for a list of goal numbers; raises ValueError for unknown goals."""
+    mask = 0
+    for g in goals:
+        if g not in SDG_NAMES:
+            raise ValueError(f"Unknown SDG: {g!r}")
+        mask |= 1 << (g - 1)
+    return mask
+
+
+def goals_of(mask: int) -> list[int]:
+    """Goal numbers set in a bitmask, ascending."""
+    return [g for g in SDG_NAMES if mask >> (g - 1) & 1]
+
+
+def membership(masks: np.ndarray) -> np.ndarray:
+    """(company, goal) boolean matrix; column j is goal j + 1."""
+    return (masks[:, None] >> (GOALS - 1)) & 1 == 1
+
+
+def aligned(masks: np.ndarray, all_of: Iterable[int] = (), any_of: Iterable[int] = ()) -> np.ndarray:
+    """Rows aligned with every goal in ``all_of`` and at least one in ``any_of`` (if given)."""
+    need, some = to_mask(all_of), to_mask(any_of)
+    hit = (masks & need) == need
+    if some:
+        hit &= (masks & some) != 0
+    return np.flatnonzero(hit)
+
+
+def goal_counts(masks: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+    """Per goal (index g - 1): aligned companies, or the sum of ``weights`` over them."""
+    matrix = membership(masks)
+    if weights is None:
+        return matrix.sum(axis=0)
+    return np.nan_to_num(weights) @ matrix
@@ -0,0 +1,97 @@
+"""Prefix/token search over company name, id, country, sector and description.
+
+Text is lowercased, accent-folded and split into alphanumeric tokens. Each
+token maps to the sorted store rows that contain it, and tokens are kept in
+sorted order, so a prefix resolves to a contiguous token range by bisection.
+A query matches companies where every query term prefixes some token
+(type-ahead). Results rank name-prefix matches first, then matches on name
+tokens, then matches elsewhere, each alphabetically. The index is built once
+per store, on first use.
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+import weakref
+
+import numpy as np
+
+from store import MetricStore
+
+SEARCH_FIELDS = ("name", "id", "country", "sector", "description")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents, so "Côte" matches "cote"."""
+    decomposed = unicodedata.normalize("NFKD", str(getattr(text, "value", text)))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def match_rank(name: str, name_tokens: set[str], terms: list[str]) -> tuple[int, str]:
+    """Sort key for a matching company, given its normalized name and name tokens."""
+    if name.startswith(" ".join(terms)):
+        return 0, name
+    if all(any(t.startswith(term) for t in name_tokens) for term in terms):
+        return 1, name
+    return 2, name
+
+
+class CompanySearchIndex:
+    """Inverted token index over one store's company attributes."""
+
+    def __init__(self, store: MetricStore):
+        self.store = store
+        postings: dict[str, set[int]] = {}
+        for field in SEARCH_FIELDS:
+            for row, value in enumerate(store.meta[field]):
+                for token in tokenize(value):
+                    postings.setdefault(token, set()).add(row)
+        self._tokens = sorted(postings)
+        self._rows = [np.fromiter(sorted(postings[t]), dtype=np.int64) for t in self._tokens]
+        self._names = [normalize(name) for name in store.meta["name"]]
+        self._name_tokens = [set(_TOKEN_RE.findall(name)) for name in self._names]
+
+    def _prefix_rows(self, prefix: str) -> np.ndarray:
+        lo = bisect.bisect_left(self._tokens, prefix)
+        hi = bisect.bisect_left(self._tokens, prefix + "\uffff", lo)
+        if hi - lo == 1:
+            return self._rows[lo]
+        return np.unique(np.concatenate(self._rows[lo:hi])) if hi > lo else np.empty(0, dtype=np.int64)
+
+    def search(self, query: str, limit: int = 20) -> list[int]:
+        """Store rows matching every term of ``query`` as a prefix, best matches first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        rows = self._prefix_rows(terms[0])
+        for term in terms[1:]:
+            if not rows.size:
+                break
+            rows = np.intersect1d(rows, self._prefix_rows(term), assume_unique=True)
+
+        return sorted(
+            rows.tolist(), key=lambda row: match_rank(self._names[row], self._name_tokens[row], terms)
+        )[:limit]
+
+    def search_ids(self, query: str, limit: int = 20) -> list[str]:
+        """Company ids matching ``query``, best matches first."""
+        return [self.store.ids[row] for row in self.search(query, limit)]
+
+
+_indexes: "weakref.WeakKeyDictionary[MetricStore, CompanySearchIndex]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def search_index(store: MetricStore) -> CompanySearchIndex:
+    """The store's search index, built on first use and shared by all sessions."""
+    with _lock:
+        if store not in _indexes:
+            _indexes[store] = CompanySearchIndex(store)
+        return _indexes[store]
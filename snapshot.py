@@ -0,0 +1,97 @@
+"""Compiled binary snapshot of the metric store, loaded via memory mapping.
+
+``python snapshot.py`` compiles data/portfolio_companies.json into a directory
+of .npy arrays plus a small meta.json. The loader memory-maps those arrays
+read-only, so a cold start skips JSON parsing and every worker process on
+the host shares one page-cache copy. If the snapshot is missing, stale, or
+from a different metric schema, the loader falls back to JSON.
+"""
+
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from data_loader import DATA_DIR, file_sha256, load_store
+from models import Sector
+from store import METRICS, MetricStore
+
+SOURCE_FILE = DATA_DIR / "portfolio_companies.json"
+COMPILED_DIR = DATA_DIR / "compiled"
+_ARRAYS = ("values", "mask", "present", "synthetic")
+_FORMAT_VERSION = 3
+
+
+def _source_fingerprint(path: Path, with_hash: bool = True) -> dict:
+    st = path.stat()
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        fp["sha256"] = file_sha256(path)
+    return fp
+
+
+def compile_snapshot(source: Path = SOURCE_FILE, out_dir: Path = COMPILED_DIR) -> Path:
+    """Compile a portfolio JSON file into a memory-mappable snapshot directory."""
+    store = load_store(source)
+    meta = {
+        "format": _FORMAT_VERSION,
+        "source": _source_fingerprint(source),
+        "metrics": METRICS,
+        "quarters": store.quarters,
+        "companies": {
+            name: [v.value if isinstance(v, Sector) else v for v in values]
+            for name, values in store.meta.items()
+        },
+    }
+
+    # Write to a sibling directory and swap it in, so readers never see a half-written snapshot
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    for name in _ARRAYS:
+        np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(getattr(store, name)), allow_pickle=False)
+    (tmp_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    old_dir = out_dir.with_name(f"{out_dir.name}.old-{os.getpid()}")
+    if out_dir.exists():
+        out_dir.rename(old_dir)
+    tmp_dir.rename(out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+def load_snapshot(source: Path = SOURCE_FILE, out_dir: Path = COMPILED_DIR) -> MetricStore | None:
+    """Memory-map a compiled snapshot, or return None if it is missing or stale."""
+    try:
+        meta = json.loads((out_dir / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != _FORMAT_VERSION or meta.get("metrics") != METRICS:
+        return None
+
+    # A matching stat is trusted; otherwise fall back to comparing content hashes
+    recorded = meta["source"]
+    current = _source_fingerprint(source, with_hash=False)
+    if (current["size"], current["mtime_ns"]) != (recorded["size"], recorded["mtime_ns"]):
+        if _source_fingerprint(source)["sha256"] != recorded["sha256"]:
+            return None
+
+    arrays = {name: np.load(out_dir / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+    companies = meta["companies"]
+    companies["sector"] = [Sector(v) for v in companies["sector"]]
+    return MetricStore(companies, meta["quarters"], **arrays)
+
+
+def load_store_fast(source: Path = SOURCE_FILE, out_dir: Path = COMPILED_DIR) -> MetricStore:
+    """Load from the compiled snapshot when it is fresh, else stream the JSON."""
+    store = load_snapshot(source, out_dir)
+    return store if store is not None else load_store(source)
+
+
+if __name__ == "__main__":
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else SOURCE_FILE
+    dest = Path(sys.argv[2]) if len(sys.argv) > 2 else src.parent / "compiled"
+    print(f"Compiled {src} -> {compile_snapshot(src, dest)}")
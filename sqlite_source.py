@@ -0,0 +1,389 @@
+"""Optional SQLite data source with indexed company, quarter and metric queries.
+
+``python sqlite_source.py`` builds data/portfolio.sqlite from every fund's
+partition, with the ingest journal applied. With DASHBOARD_DATA_BACKEND=sqlite,
+the company detail page pulls only the company it renders from the database,
+and the in-memory dataset is not loaded for it. The database records the
+manifest, partition and journal files it was built from (their stats), and
+SQLiteSource.refresh() rebuilds it when any of them moved.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from data_loader import DATA_DIR, load_store
+from ingest import JOURNAL_FILE, apply_entries, read_journal
+from models import QuarterlySnapshot, format_quarter, parse_quarter
+from partitions import MANIFEST_FILE, load_partition, read_manifest
+from search import SEARCH_FIELDS, match_rank, normalize, tokenize
+from store import (
+    COMPANY_FIELDS, INT_METRICS, METRIC_BLOCK, METRIC_BLOCKS, METRICS, MetricStore, StoreBuilder, concat_stores,
+)
+
+DB_PATH = DATA_DIR / "portfolio.sqlite"
+
+_METRIC_COLUMNS = ", ".join(
+    f"{m} {'INTEGER' if m in INT_METRICS else 'REAL'}" for m in METRICS
+)
+
+_SCHEMA = f"""
+CREATE TABLE companies (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    country TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    iv_name TEXT,
+    founded_year INTEGER,
+    description TEXT,
+    sdg_mask INTEGER NOT NULL DEFAULT 0,
+    fund TEXT NOT NULL
+);
+CREATE INDEX companies_sector ON companies (sector);
+CREATE INDEX companies_country ON companies (country);
+CREATE INDEX companies_fund ON companies (fund);
+
+CREATE TABLE snapshots (
+    company_id TEXT NOT NULL REFERENCES companies (id),
+    quarter_key INTEGER NOT NULL,
+    quarter TEXT NOT NULL,
+    is_synthetic INTEGER NOT NULL,
+    {_METRIC_COLUMNS},
+    PRIMARY KEY (company_id, quarter_key)
+) WITHOUT ROWID;
+CREATE INDEX snapshots_quarter ON snapshots (quarter_key);
+
+-- Search tokens of each company, as search.py tokenizes them
+CREATE TABLE search_tokens (
+    token TEXT NOT NULL,
+    company_id TEXT NOT NULL REFERENCES companies (id),
+    PRIMARY KEY (token, company_id)
+) WITHOUT ROWID;
+
+-- Stats of the files the database was built from (see source_signature)
+CREATE TABLE build_info (sources TEXT);
+"""
+
+
+def source_signature(data_dir: Path = DATA_DIR) -> str:
+    """Stats of the files a database is built from: the manifest, every partition file and the journal."""
+    manifest = data_dir / MANIFEST_FILE
+    paths = [manifest] if manifest.exists() else []
+    paths += [path for partition in read_manifest(data_dir) for path in partition.files()]
+    stats = [(str(path), (st := path.stat()).st_mtime_ns, st.st_size) for path in paths]
+    try:
+        st = (data_dir / JOURNAL_FILE).stat()
+        # Compaction replaces the journal, so its inode changes
+        journal = (st.st_ino, st.st_size)
+    except FileNotFoundError:
+        journal = None
+    return json.dumps([stats, journal])
+
+
+def load_portfolio(data_dir: Path = DATA_DIR) -> MetricStore:
+    """Every fund's partition with the ingest journal applied, as one store in manifest order."""
+    entries, _ = read_journal(data_dir / JOURNAL_FILE)
+    # The single-file layout keeps its compiled snapshot where snapshot.py writes it
+    compiled = data_dir / "compiled"
+    single_file = not (data_dir / MANIFEST_FILE).exists()
+    stores = []
+    for partition in read_manifest(data_dir):
+        store = load_partition(partition, compiled if single_file else compiled / partition.slug)
+        stores.append(apply_entries(store, entries, partition.fund)[0])
+    return concat_stores(stores)
+
+
+def build_database(store: MetricStore, path: Path = DB_PATH, sources: str | None = None) -> Path:
+    """Write the store to a fresh SQLite file, replacing any existing one atomically.
+
+    ``sources`` is the source_signature of the files the store was loaded from.
+    """
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT INTO build_info VALUES (?)", (sources,))
+        conn.executemany(
+            "INSERT INTO search_tokens VALUES (?, ?)",
+            {
+                (token, cid)
+                for field in SEARCH_FIELDS
+                for cid, value in zip(store.ids, store.meta[field])
+                for token in tokenize(value)
+            },
+        )
+        conn.executemany(
+            f"INSERT INTO companies VALUES ({', '.join('?' * len(COMPANY_FIELDS))})",
+            zip(*(
+                [getattr(v, "value", v) for v in store.meta[name]] for name in COMPANY_FIELDS
+            )),
+        )
+
+        def rows():
+            for i, q in zip(*np.nonzero(store.present)):
+                values = [
+                    None if not present else int(v) if m in INT_METRICS else float(v)
+                    for m, v, present in zip(METRICS, store.values[i, q], store.mask[i, q])
+                ]
+                quarter = store.quarters[q]
+                yield (store.ids[i], parse_quarter(quarter), quarter, bool(store.synthetic[i, q]), *values)
+
+        conn.executemany(
+            f"INSERT INTO snapshots VALUES ({', '.join('?' * (4 + len(METRICS)))})", rows()
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def _where(clauses: dict[str, list]) -> tuple[str, list]:
+    """Build a WHERE clause of ``column IN (...)`` filters, skipping unset ones."""
+    sql, params = [], []
+    for column, values in clauses.items():
+        if values is None:
+            continue
+        values = [getattr(v, "value", v) for v in values]
+        sql.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return (" WHERE " + " AND ".join(sql) if sql else ""), params
+
+
+class SQLiteSource:
+    """Read-only query API over a database written by build_database.
+
+    Connections are opened per thread, since Streamlit runs sessions on
+    separate threads, and reopened after the database is rebuilt. Companies
+    are in manifest order, as in the in-memory store of all funds.
+    """
+
+    def __init__(self, path: Path = DB_PATH, data_dir: Path = DATA_DIR):
+        self.path = path
+        self.data_dir = data_dir
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._signature: str | None = None
+        self._generation = 0
+
+    def refresh(self) -> bool:
+        """Rebuild the database if its source files moved since it was built; returns True if they had.
+
+        Called once per page run, so this is a stat of each source file unless
+        something changed.
+        """
+        signature = source_signature(self.data_dir)
+        if signature == self._signature:
+            return False
+        with self._lock:
+            # Another session may have rebuilt while we waited for the lock
+            if signature != self._signature:
+                if _built_from(self.path) != signature:
+                    build_database(load_portfolio(self.data_dir), self.path, signature)
+                self._signature = signature
+                self._generation += 1
+        return True
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            if conn is not None:
+                conn.close()
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            self._local.conn, self._local.generation = conn, self._generation
+        return conn
+
+    def count(self, funds: list[str] | None = None) -> int:
+        """Number of companies in the given funds."""
+        where, params = _where({"fund": funds})
+        return self._conn.execute(f"SELECT COUNT(*) FROM companies{where}", params).fetchone()[0]
+
+    def company_names(self, sectors: list[str] | None = None, countries: list[str] | None = None,
+                      funds: list[str] | None = None, ids: list[str] | None = None,
+                      limit: int | None = None) -> dict[str, str]:
+        """Company id -> display name, in file order."""
+        where, params = _where({"sector": sectors, "country": countries, "fund": funds, "id": ids})
+        where += " ORDER BY rowid"
+        if limit is not None:
+            where += " LIMIT ?"
+            params.append(limit)
+        rows = self._conn.execute(f"SELECT id, name FROM companies{where}", params)
+        return {row["id"]: row["name"] for row in rows}
+
+    def position(self, company_id: str, funds: list[str] | None = None) -> int | None:
+        """Row of a company in the store of the given funds, or None if it isn't in them."""
+        where, params = _where({"fund": funds, "id": [company_id]})
+        if self._conn.execute(f"SELECT 1 FROM companies{where}", params).fetchone() is None:
+            return None
+        where, params = _where({"fund": funds})
+        where = (where + " AND" if where else " WHERE") + " rowid < (SELECT rowid FROM companies WHERE id = ?)"
+        return self._conn.execute(f"SELECT COUNT(*) FROM companies{where}", params + [company_id]).fetchone()[0]
+
+    def quarters(self, funds: list[str] | None = None) -> list[str]:
+        """The contiguous quarter axis of the given funds' snapshots, as in MetricStore.quarters."""
+        where, params = _where({"c.fund": funds})
+        first, last = self._conn.execute(
+            f"SELECT MIN(s.quarter_key), MAX(s.quarter_key) FROM snapshots s"
+            f" JOIN companies c ON c.id = s.company_id{where}",
+            params,
+        ).fetchone()
+        return [] if first is None else [format_quarter(key) for key in range(first, last + 1)]
+
+    def search_ids(self, query: str, limit: int = 20, funds: list[str] | None = None) -> list[str]:
+        """Company ids matching ``query``, best matches first, as CompanySearchIndex.search_ids ranks them."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        matches = " INTERSECT ".join(
+            "SELECT company_id FROM search_tokens WHERE token >= ? AND token < ?" for _ in terms
+        )
+        where, params = _where({"fund": funds})
+        where = (where + " AND" if where else " WHERE") + f" id IN ({matches})"
+        rows = self._conn.execute(
+            f"SELECT id, name FROM companies{where} ORDER BY rowid",
+            params + [bound for term in terms for bound in (term, term + "\uffff")],
+        ).fetchall()
+
+        def rank(row: sqlite3.Row) -> tuple[int, str]:
+            name = normalize(row["name"])
+            return match_rank(name, set(tokenize(name)), terms)
+
+        return [row["id"] for row in sorted(rows, key=rank)[:limit]]
+
+    def select(self, ids: list[str] | None = None, sectors: list[str] | None = None,
+               countries: list[str] | None = None,
+               quarters: tuple[str, str] | None = None, funds: list[str] | None = None) -> MetricStore:
+        """Load only the matching companies and quarters into a MetricStore."""
+        where, params = _where({"id": ids, "sector": sectors, "country": countries, "fund": funds})
+        companies = self._conn.execute(
+            f"SELECT {', '.join(COMPANY_FIELDS)} FROM companies{where} ORDER BY rowid", params
+        ).fetchall()
+        builder = StoreBuilder()
+        if not companies:
+            return builder.build()
+
+        snap_where, snap_params = _where({"company_id": [c["id"] for c in companies]})
+        if quarters:
+            snap_where += " AND quarter_key BETWEEN ? AND ?"
+            snap_params += [parse_quarter(quarters[0]), parse_quarter(quarters[1])]
+        by_company: dict[str, list[dict]] = {c["id"]: [] for c in companies}
+        for row in self._conn.execute(
+            f"SELECT * FROM snapshots{snap_where} ORDER BY company_id, quarter_key", snap_params
+        ):
+            by_company[row["company_id"]].append(_snapshot_record(row))
+
+        for c in companies:
+            builder.add({**dict(c), "snapshots": by_company[c["id"]]})
+        return builder.build()
+
+    def company(self, company_id: str):
+        """One company as a PortfolioCompany, or None if unknown."""
+        store = self.select(ids=[company_id])
+        return store.company(0) if len(store) else None
+
+    def companies_at(self, quarter: str, sectors: list[str] | None = None, countries: list[str] | None = None,
+                     funds: list[str] | None = None) -> dict[str, QuarterlySnapshot]:
+        """Every matching company's snapshot for one quarter, keyed by company id."""
+        where, params = _where({"c.sector": sectors, "c.country": countries, "c.fund": funds})
+        where = (where + " AND" if where else " WHERE") + " s.quarter_key = ?"
+        rows = self._conn.execute(
+            f"SELECT s.* FROM snapshots s JOIN companies c ON c.id = s.company_id{where}",
+            params + [parse_quarter(quarter)],
+        )
+        return {row["company_id"]: _snapshot_from_row(row) for row in rows}
+
+    def aggregates(self, sectors: list[str] | None = None, countries: list[str] | None = None,
+                   as_of: str | None = None, funds: list[str] | None = None) -> dict:
+        """compute_aggregates over each matching company's latest snapshot, in SQL."""
+        where, params = _where({"c.sector": sectors, "c.country": countries, "c.fund": funds})
+        as_of_key = parse_quarter(as_of) if as_of else sys.maxsize
+        row = self._conn.execute(
+            f"""
+            SELECT
+                COUNT(*) AS company_count,
+                COALESCE(SUM(s.direct_jobs), 0) + COALESCE(SUM(s.indirect_jobs), 0) AS total_jobs,
+                COALESCE(SUM(s.total_beneficiaries), 0) AS total_beneficiaries,
+                COALESCE(SUM(s.total_funding_usd), 0.0) AS total_funding_usd,
+                AVG(s.female_participation_pct) AS avg_female_pct,
+                AVG(s.youth_participation_pct) AS avg_youth_pct
+            FROM companies c
+            LEFT JOIN snapshots s ON s.company_id = c.id AND s.quarter_key = (
+                SELECT MAX(quarter_key) FROM snapshots WHERE company_id = c.id AND quarter_key <= ?
+            ){where}
+            """,
+            [as_of_key] + params,
+        ).fetchone()
+        return {
+            "total_jobs": row["total_jobs"],
+            "total_beneficiaries": row["total_beneficiaries"],
+            "total_funding_usd": float(row["total_funding_usd"]),
+            "avg_female_pct": row["avg_female_pct"],
+            "avg_youth_pct": row["avg_youth_pct"],
+            "company_count": row["company_count"],
+        }
+
+
+def _built_from(path: Path) -> str | None:
+    """The source_signature a database file was built from (None if missing or unrecorded)."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        row = conn.execute("SELECT sources FROM build_info").fetchone()
+    except sqlite3.DatabaseError:
+        # Built before build_info was recorded
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _snapshot_record(row: sqlite3.Row) -> dict:
+    """A snapshots row in the JSON record shape StoreBuilder.add expects."""
+    record = {"quarter": row["quarter"], "is_synthetic": bool(row["is_synthetic"])}
+    for block in METRIC_BLOCKS:
+        record[block] = {}
+    for m in METRICS:
+        record[METRIC_BLOCK[m]][m] = row[m]
+    return record
+
+
+def _snapshot_from_row(row: sqlite3.Row) -> QuarterlySnapshot:
+    record = _snapshot_record(row)
+    return QuarterlySnapshot(
+        quarter=record["quarter"],
+        is_synthetic=record["is_synthetic"],
+        **{block: cls(**record[block]) for block, cls in METRIC_BLOCKS.items()},
+    )
+
+
+_default_source: SQLiteSource | None = None
+_default_lock = threading.Lock()
+
+
+def default_source() -> SQLiteSource:
+    """The process-wide SQLite source shared by every session."""
+    global _default_source
+    with _default_lock:
+        if _default_source is None:
+            _default_source = SQLiteSource()
+        return _default_source
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # One portfolio file into any database; the app won't treat it as built from DATA_DIR
+        src = Path(sys.argv[1])
+        dest = Path(sys.argv[2]) if len(sys.argv) > 2 else DB_PATH
+        print(f"Built {build_database(load_store(src), dest)}")
+    else:
+        print(f"Built {build_database(load_portfolio(), DB_PATH, source_signature())}")
@@ -0,0 +1,66 @@
+"""Cold-start timing: import, data load and first render, once per server process.
+
+app.py times its own imports (the app shell only), the initial data load
+including the import of the data modules, and the first page render.
+In "lazy" startup mode (the default) heavy modules such as the chart factories
+are imported by the first page that renders them; in "eager" mode app.py
+imports them up front, so the cost lands before the first page instead.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from config import STARTUP_MODE
+
+# Imported up front in eager mode; otherwise by the pages that use them. Only
+# modules that take noticeable time to import belong here: pandas, which
+# st.dataframe loads on first use (about half a second), and the Plotly chart factories.
+HEAVY_MODULES = ("pandas", "components.charts")
+
+
+@dataclass
+class StartupReport:
+    mode: str
+    phases: dict[str, float] = field(default_factory=dict)  # phase -> seconds
+    first_render_modules: list[str] = field(default_factory=list)
+
+    @property
+    def total_s(self) -> float:
+        return sum(self.phases.values())
+
+
+STARTUP = StartupReport(mode=STARTUP_MODE)
+_lock = threading.Lock()
+
+
+def record(phase: str, seconds: float) -> None:
+    """Record a phase's duration the first time it runs in this process."""
+    with _lock:
+        STARTUP.phases.setdefault(phase, seconds)
+
+
+@contextmanager
+def timed(phase: str):
+    """Time a block as ``phase``; only the first run in the process is kept."""
+    if phase in STARTUP.phases:
+        yield
+        return
+    before = set(sys.modules)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+        if phase == "first_render":
+            STARTUP.first_render_modules = sorted(set(sys.modules) - before)
+
+
+def preload() -> None:
+    """Import the heavy modules now (eager mode), timing them as one phase."""
+    with timed("preload"):
+        for name in HEAVY_MODULES:
+            importlib.import_module(name)
@@ -0,0 +1,466 @@
+"""Columnar company × quarter × metric store for portfolio data.
+
+The store is built once at load time. Aggregates and pages read whole metric
+columns as NumPy arrays; the models.py dataclass tree is only materialized,
+one company at a time, for code that still wants attribute access.
+"""
+
+import dataclasses
+import math
+import typing
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+
+import tracing
+from config import DEFAULT_FUND, STATUS_CODES, GREY, evaluate_status_batch
+from sdg import to_mask
+from models import (
+    PortfolioCompany, QuarterlySnapshot, ImpactMetrics,
+    FinancialMetrics, OperationalMetrics, Sector,
+    parse_quarter, format_quarter,
+)
+
+METRIC_BLOCKS = {
+    "impact": ImpactMetrics,
+    "financial": FinancialMetrics,
+    "operational": OperationalMetrics,
+}
+
+# Flat metric axis, grouped by block in declaration order. Field names are
+# unique across blocks, so the bare field name is the metric key.
+METRICS: list[str] = []
+METRIC_BLOCK: dict[str, str] = {}
+BLOCK_SLICES: dict[str, slice] = {}
+for _block, _cls in METRIC_BLOCKS.items():
+    _names = [f.name for f in dataclasses.fields(_cls)]
+    BLOCK_SLICES[_block] = slice(len(METRICS), len(METRICS) + len(_names))
+    METRICS.extend(_names)
+    METRIC_BLOCK.update(dict.fromkeys(_names, _block))
+METRIC_INDEX = {name: i for i, name in enumerate(METRICS)}
+
+# Metrics declared as Optional[int]; everything else materializes as float.
+INT_METRICS = frozenset(
+    f.name
+    for cls in METRIC_BLOCKS.values()
+    for f in dataclasses.fields(cls)
+    if int in typing.get_args(typing.get_type_hints(cls)[f.name])
+)
+
+_NUMBER_TYPES = {int, float}
+_SNAPSHOT_KEYS = {"quarter", "is_synthetic", *METRIC_BLOCKS}
+
+# Company-level (non time-series) attributes, stored as parallel lists.
+COMPANY_FIELDS = ("id", "name", "country", "sector", "iv_name", "founded_year", "description", "sdg_mask", "fund")
+
+
+def company_meta(c: dict) -> dict:
+    """A raw company record's COMPANY_FIELDS values, normalized as the store keeps them."""
+    c = {
+        **c,
+        "sector": Sector(c["sector"]),
+        "sdg_mask": c["sdg_mask"] if "sdg_mask" in c else to_mask(c.get("sdgs", ())),
+        "fund": c.get("fund") or DEFAULT_FUND,
+    }
+    return {name: c[name] for name in COMPANY_FIELDS}
+
+
+def snapshot_row(s: dict, rejected: list | None = None) -> list[float]:
+    """One raw snapshot's values along the metric axis, NaN where not reported.
+
+    Unknown keys are skipped, as the dataclass builder did. With ``rejected``,
+    they are also recorded there as ``(field, value, problem)``, as are values
+    that are not numbers and NaN literals (which are left out of the row).
+    """
+    row = [math.nan] * len(METRICS)
+    if rejected is None:
+        for block in METRIC_BLOCKS:
+            for key, value in (s.get(block) or {}).items():
+                if value is not None and METRIC_BLOCK.get(key) == block:
+                    row[METRIC_INDEX[key]] = value
+        return row
+
+    for block in METRIC_BLOCKS:
+        for key, value in (s.get(block) or {}).items():
+            if METRIC_BLOCK.get(key) != block:
+                rejected.append((f"{block}.{key}", value, "unknown"))
+            elif value is not None:
+                if value != value:
+                    # NaN would pass for a missing value in the cube
+                    rejected.append((f"{block}.{key}", value, "finite"))
+                else:
+                    row[METRIC_INDEX[key]] = value
+    if not set(map(type, row)) <= _NUMBER_TYPES:
+        for i, value in enumerate(row):
+            if type(value) not in _NUMBER_TYPES:
+                rejected.append((f"{METRIC_BLOCK[METRICS[i]]}.{METRICS[i]}", value, "type"))
+                row[i] = math.nan
+    return row
+
+
+class StoreBuilder:
+    """Accumulate raw company records and build a MetricStore in one allocation.
+
+    Snapshot rows are appended to flat typed arrays as they arrive, so a
+    streaming loader never holds more than one parsed company at a time.
+    With ``collect_rejected``, raw values the cube cannot hold are recorded
+    in ``rejected`` as ``(company, snapshot position, field, value, problem)``
+    instead of being dropped or raising, for schema.py to report.
+    """
+
+    def __init__(self, collect_rejected: bool = False):
+        self._meta = {name: [] for name in COMPANY_FIELDS}
+        self._values = array("d")     # row-major (snapshot, metric) values
+        self._company = array("q")    # company index per snapshot
+        self._position = array("q")   # index in the company's snapshots list
+        self._quarter = array("q")    # period key per snapshot
+        self._synthetic = array("b")  # is_synthetic per snapshot
+        self.rejected: list[tuple[int, int, str, object, str]] | None = [] if collect_rejected else None
+        # Rows of snapshots without a valid quarter: checked, but never built
+        self._unplaced: list[tuple[int, int, list[float]]] = []
+
+    def add(self, c: dict) -> None:
+        """Add one company record shaped like an entry of portfolio_companies.json."""
+        idx = len(self._meta["id"])
+        for name, value in company_meta(c).items():
+            self._meta[name].append(value)
+        self.add_snapshots(idx, c["snapshots"])
+
+    def add_snapshots(self, company: int, snapshots: list[dict]) -> None:
+        """Append raw snapshots of the company added at position ``company``."""
+        if self.rejected is None:
+            for j, s in enumerate(snapshots):
+                self._values.extend(snapshot_row(s))
+                self._company.append(company)
+                self._position.append(j)
+                self._quarter.append(parse_quarter(s["quarter"]))
+                self._synthetic.append(bool(s.get("is_synthetic", False)))
+            return
+
+        problems = []
+        for j, s in enumerate(snapshots):
+            if type(s) is not dict:
+                self.rejected.append((company, j, "", s, "object"))
+                continue
+            if not s.keys() <= _SNAPSHOT_KEYS:
+                problems += [(key, s[key], "unknown") for key in s.keys() - _SNAPSHOT_KEYS]
+            flag = s.get("is_synthetic", False)
+            if type(flag) is not bool:
+                problems.append(("is_synthetic", flag, "type"))
+            row = snapshot_row(s, problems)
+            try:
+                key = parse_quarter(s["quarter"])
+            except (KeyError, TypeError, ValueError):
+                # Without a quarter the row has no place in the cube
+                self.rejected += [(company, j, "quarter", s.get("quarter"), "quarter"), *((company, j, *p) for p in problems)]
+                self._unplaced.append((company, j, row))
+                problems = []
+                continue
+            self._values.extend(row)
+            self._company.append(company)
+            self._position.append(j)
+            self._quarter.append(key)
+            self._synthetic.append(flag is True)
+            if problems:
+                self.rejected += [(company, j, *p) for p in problems]
+                problems = []
+
+    def snapshot_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Company, position in its snapshots list, period key and (snapshot, metric) values per snapshot."""
+        return (
+            np.frombuffer(self._company, dtype=np.int64),
+            np.frombuffer(self._position, dtype=np.int64),
+            np.frombuffer(self._quarter, dtype=np.int64),
+            np.frombuffer(self._values, dtype=np.float64).reshape(-1, len(METRICS)),
+        )
+
+    def unplaced_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Company, position and values of the snapshots left out for an invalid quarter."""
+        unplaced = self._unplaced
+        return (
+            np.array([c for c, _, _ in unplaced], dtype=np.int64),
+            np.array([j for _, j, _ in unplaced], dtype=np.int64),
+            np.array([row for _, _, row in unplaced], dtype=np.float64).reshape(-1, len(METRICS)),
+        )
+
+    def build(self) -> "MetricStore":
+        n_companies = len(self._meta["id"])
+        rows = np.frombuffer(self._values, dtype=np.float64).reshape(-1, len(METRICS))
+        company = np.frombuffer(self._company, dtype=np.int64)
+        keys = np.frombuffer(self._quarter, dtype=np.int64)
+
+        # Contiguous quarter axis, so gaps in reporting stay visible as missing
+        first = int(keys.min()) if keys.size else 0
+        n_quarters = int(keys.max()) - first + 1 if keys.size else 0
+        quarters = [format_quarter(first + q) for q in range(n_quarters)]
+
+        values = np.full((n_companies, n_quarters, len(METRICS)), np.nan)
+        present = np.zeros((n_companies, n_quarters), dtype=bool)
+        synthetic = np.zeros((n_companies, n_quarters), dtype=bool)
+        values[company, keys - first] = rows
+        present[company, keys - first] = True
+        synthetic[company, keys - first] = np.frombuffer(self._synthetic, dtype=np.int8).astype(bool)
+
+        return MetricStore(self._meta, quarters, values, present, synthetic)
+
+
+class MetricStore:
+    """Dense company × quarter × metric cube with a null mask.
+
+    ``values`` holds NaN wherever a metric was not reported, ``mask`` is True
+    where it was, and ``present`` marks which (company, quarter) snapshots exist.
+    The quarter axis is contiguous and sorted by period key, so quarter labels
+    map to positions in O(1). ``asof[c, q]`` is the position of company c's
+    most recent snapshot at or before quarter q (-1 if none).
+    """
+
+    def __init__(self, meta: dict[str, list], quarters: list[str],
+                 values: np.ndarray, present: np.ndarray, synthetic: np.ndarray,
+                 mask: np.ndarray | None = None):
+        self.meta = meta
+        self.quarters = quarters
+        self.values = values
+        self.mask = ~np.isnan(values) if mask is None else mask
+        self.present = present
+        self.synthetic = synthetic
+        self.company_index = {cid: i for i, cid in enumerate(meta["id"])}
+        self.sdg_mask = np.asarray(meta["sdg_mask"], dtype=np.uint32)
+
+        self.quarter_keys = np.array([parse_quarter(q) for q in quarters], dtype=np.int64)
+        self.quarter_index = {q: i for i, q in enumerate(quarters)}
+        positions = np.where(present, np.arange(len(quarters)), -1)
+        self.asof = np.maximum.accumulate(positions, axis=1) if quarters else positions
+        self.latest_idx = self.as_of_idx()
+
+        # One store is shared by every session in the process, so its arrays are read-only
+        for arr in (self.values, self.mask, self.present, self.synthetic, self.asof, self.sdg_mask):
+            arr.flags.writeable = False
+
+        self._companies: dict[int, PortfolioCompany] = {}
+        self._snapshots: dict[tuple[int, int], QuarterlySnapshot] = {}
+        self._status: np.ndarray | None = None
+        self._latest_status: dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.meta["id"])
+
+    @property
+    def ids(self) -> list[str]:
+        return self.meta["id"]
+
+    def company_names(self) -> dict[str, str]:
+        """Company id -> display name, in load order."""
+        return dict(zip(self.meta["id"], self.meta["name"]))
+
+    def select(self, ids: list[str]) -> "MetricStore":
+        """A sub-store holding only the given companies (same quarter axis)."""
+        rows = [self.company_index[cid] for cid in ids]
+        meta = {name: [values[i] for i in rows] for name, values in self.meta.items()}
+        return MetricStore(meta, self.quarters, self.values[rows], self.present[rows],
+                           self.synthetic[rows], self.mask[rows])
+
+    def position(self, key: int | str) -> int:
+        """Resolve a company id or (possibly negative) position to a row index."""
+        return self.company_index[key] if isinstance(key, str) else range(len(self))[key]
+
+    # Quarter index
+
+    def quarter_position(self, as_of: str | None = None) -> int:
+        """Position on the quarter axis for an as-of label; None means the last quarter.
+
+        Labels past the end clamp to the last quarter; labels before the first
+        quarter give -1 (nothing reported yet).
+        """
+        if as_of is None or not self.quarters:
+            return len(self.quarters) - 1
+        pos = parse_quarter(as_of) - int(self.quarter_keys[0])
+        return min(pos, len(self.quarters) - 1) if pos >= 0 else -1
+
+    def as_of_idx(self, as_of: str | None = None) -> np.ndarray:
+        """Per company, the quarter position of its latest snapshot as of a quarter (-1 if none)."""
+        pos = self.quarter_position(as_of)
+        if pos < 0:
+            return np.full(len(self), -1)
+        return self.asof[:, pos]
+
+    def companies_at(self, quarter: str) -> np.ndarray:
+        """Row positions of companies that reported exactly this quarter."""
+        q = self.quarter_index.get(quarter)
+        return np.flatnonzero(self.present[:, q]) if q is not None else np.array([], dtype=np.intp)
+
+    # Metric columns
+
+    def column(self, metric: str) -> np.ndarray:
+        """All values of one metric as a (company, quarter) array."""
+        return self.values[:, :, METRIC_INDEX[metric]]
+
+    @tracing.traced("data")
+    def latest_values(self, as_of: str | None = None) -> np.ndarray:
+        """(company, metric) matrix of each company's latest snapshot, NaN if absent."""
+        idx = self.as_of_idx(as_of)
+        latest = self.values[np.arange(len(self)), np.maximum(idx, 0)]
+        latest[idx < 0] = np.nan
+        return latest
+
+    def latest(self, metric: str, as_of: str | None = None) -> np.ndarray:
+        """Latest value of one metric per company, NaN if missing."""
+        return self.latest_values(as_of)[:, METRIC_INDEX[metric]]
+
+    # Traffic-light status
+
+    @tracing.traced("kpi")
+    def status_codes(self) -> np.ndarray:
+        """Status code (see config.STATUS_CODES) for every company, quarter and metric."""
+        if self._status is None:
+            self._status = evaluate_status_batch(METRICS, self.values)
+            self._status.flags.writeable = False
+        return self._status
+
+    def latest_status(self, as_of: str | None = None) -> np.ndarray:
+        """(company, metric) status codes for each company's latest snapshot."""
+        pos = self.quarter_position(as_of)
+        if pos not in self._latest_status:
+            idx = self.as_of_idx(as_of)
+            latest = self.status_codes()[np.arange(len(self)), np.maximum(idx, 0)]
+            latest[idx < 0] = GREY
+            latest.flags.writeable = False
+            self._latest_status[pos] = latest
+        return self._latest_status[pos]
+
+    def status(self, key: int | str, metric: str, as_of: str | None = None) -> str:
+        """Status name of one metric in a company's latest snapshot."""
+        return STATUS_CODES[self.latest_status(as_of)[self.position(key), METRIC_INDEX[metric]]]
+
+    # Dataclass view
+
+    @property
+    def companies(self) -> "CompanyView":
+        return CompanyView(self)
+
+    def company(self, key: int | str) -> PortfolioCompany:
+        """Materialize one company (by position or id) as a PortfolioCompany."""
+        i = self.position(key)
+        if i not in self._companies:
+            self._companies[i] = PortfolioCompany(
+                **{name: self.meta[name][i] for name in COMPANY_FIELDS},
+                snapshots=self.snapshots(i),
+            )
+        return self._companies[i]
+
+    def snapshot(self, key: int | str, as_of: str | None = None) -> QuarterlySnapshot | None:
+        """A company's latest snapshot as of a quarter, in O(1)."""
+        i = self.position(key)
+        pos = self.quarter_position(as_of)
+        q = self.asof[i, pos] if pos >= 0 else -1
+        return self._snapshot(i, q) if q >= 0 else None
+
+    def snapshots(self, key: int | str, as_of: str | None = None) -> list[QuarterlySnapshot]:
+        """A company's snapshots in quarter order, up to and including an as-of quarter."""
+        i = self.position(key)
+        pos = self.quarter_position(as_of)
+        return [self._snapshot(i, q) for q in np.flatnonzero(self.present[i, :pos + 1])]
+
+    def _snapshot(self, i: int, q: int) -> QuarterlySnapshot:
+        if (i, q) not in self._snapshots:
+            self._snapshots[i, q] = QuarterlySnapshot(
+                quarter=self.quarters[q],
+                is_synthetic=bool(self.synthetic[i, q]),
+                **{
+                    block: _build_record(cls, self.values[i, q, BLOCK_SLICES[block]],
+                                         self.mask[i, q, BLOCK_SLICES[block]])
+                    for block, cls in METRIC_BLOCKS.items()
+                },
+            )
+        return self._snapshots[i, q]
+
+
+def concat_stores(stores: Sequence[MetricStore]) -> MetricStore:
+    """Stack stores with disjoint companies onto one quarter axis spanning them all."""
+    if len(stores) == 1:
+        return stores[0]
+    spans = [(int(s.quarter_keys[0]), int(s.quarter_keys[-1])) for s in stores if s.quarters]
+    first = min((a for a, _ in spans), default=0)
+    n_quarters = max((b for _, b in spans), default=first - 1) - first + 1
+    n_companies = sum(len(s) for s in stores)
+
+    values = np.full((n_companies, n_quarters, len(METRICS)), np.nan)
+    mask = np.zeros(values.shape, dtype=bool)
+    present = np.zeros((n_companies, n_quarters), dtype=bool)
+    synthetic = np.zeros((n_companies, n_quarters), dtype=bool)
+    row = 0
+    for s in stores:
+        if s.quarters:
+            q = int(s.quarter_keys[0]) - first
+            rows, cols = slice(row, row + len(s)), slice(q, q + len(s.quarters))
+            values[rows, cols] = s.values
+            mask[rows, cols] = s.mask
+            present[rows, cols] = s.present
+            synthetic[rows, cols] = s.synthetic
+        row += len(s)
+
+    meta = {name: [v for s in stores for v in s.meta[name]] for name in COMPANY_FIELDS}
+    quarters = [format_quarter(first + q) for q in range(n_quarters)]
+    return MetricStore(meta, quarters, values, present, synthetic, mask)
+
+
+def with_snapshots(store: MetricStore, companies: Sequence[dict],
+                   snapshots: Sequence[tuple[str, dict]]) -> MetricStore:
+    """A new store with ``companies`` appended and raw ``(company id, snapshot)`` pairs written in.
+
+    A snapshot replaces any existing one for the same company and quarter, and
+    the quarter axis grows to cover new quarters. The cube is copied once
+    instead of being rebuilt from JSON; ``store`` itself is left unchanged.
+    """
+    index = dict(store.company_index)
+    for c in companies:
+        index[c["id"]] = len(index)
+    keys = [parse_quarter(s["quarter"]) for _, s in snapshots]
+    span = [*keys, *store.quarter_keys[[0, -1]].tolist()] if store.quarters else keys
+    first = min(span, default=0)
+    n_quarters = max(span, default=first - 1) - first + 1
+
+    values = np.full((len(index), n_quarters, len(METRICS)), np.nan)
+    present = np.zeros((len(index), n_quarters), dtype=bool)
+    synthetic = np.zeros((len(index), n_quarters), dtype=bool)
+    if store.quarters:
+        cols = slice(int(store.quarter_keys[0]) - first, int(store.quarter_keys[-1]) - first + 1)
+        values[:len(store), cols] = store.values
+        present[:len(store), cols] = store.present
+        synthetic[:len(store), cols] = store.synthetic
+    for (cid, s), key in zip(snapshots, keys):
+        i, q = index[cid], key - first
+        values[i, q] = snapshot_row(s)
+        present[i, q] = True
+        synthetic[i, q] = bool(s.get("is_synthetic", False))
+
+    meta = {name: list(column) for name, column in store.meta.items()}
+    for c in companies:
+        for name, value in company_meta(c).items():
+            meta[name].append(value)
+    quarters = [format_quarter(first + q) for q in range(n_quarters)]
+    return MetricStore(meta, quarters, values, present, synthetic)
+
+
+def _build_record(cls, values: np.ndarray, mask: np.ndarray):
+    """Build a metric dataclass from one block's slice of the cube."""
+    kwargs = {}
+    for f, value, present in zip(dataclasses.fields(cls), values, mask):
+        if present:
+            kwargs[f.name] = int(value) if f.name in INT_METRICS else float(value)
+    return cls(**kwargs)
+
+
+class CompanyView(Sequence):
+    """Read-only list of PortfolioCompany objects, materialized on first access."""
+
+    def __init__(self, store: MetricStore):
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.store.company(j) for j in range(len(self))[i]]
+        return self.store.company(i)
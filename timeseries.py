@@ -0,0 +1,145 @@
+"""Derived time series over the metric cube: growth, rolling means, running totals.
+
+Company series are (company, quarter) arrays per metric, computed the first
+time a metric and kind are asked for and kept for the dataset version, so the
+cube costs memory only for the metrics the pages chart. Portfolio arrays are
+(quarter, metric) and small, so they are built up front. Portfolio totals,
+means and counts carry each company's latest snapshot forward, like the
+headline aggregates. Missing reports otherwise stay NaN throughout. Growth
+is NaN unless both quarters were reported, and rolling means and running
+totals skip gaps. Portfolio growth is like-for-like:
+it only compares companies that reported in both quarters, so a company
+joining or skipping a quarter doesn't show up as growth. The cube is built
+once per dataset version (see Dataset.timeseries).
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from store import METRIC_INDEX, MetricStore
+
+# Quarters per year, the YoY lag
+YOY_LAG = 4
+ROLLING_WINDOW = 4
+
+COMPANY_KINDS = ("value", "qoq", "yoy", "rolling", "cumulative")
+PORTFOLIO_KINDS = ("total", "mean", "count", "qoq", "yoy", "rolling", "cumulative")
+
+
+def growth(values: np.ndarray, lag: int) -> np.ndarray:
+    """Fractional change over ``lag`` quarters along axis 1; NaN if either end is missing or the base is 0."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] > lag:
+        cur, prev = values[:, lag:], values[:, :-lag]
+        np.divide(cur - prev, np.abs(prev), out=out[:, lag:], where=prev != 0)
+        out[:, lag:][np.isnan(prev) | np.isnan(cur)] = np.nan
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the reported values in the trailing ``window`` quarters along axis 1."""
+    sums = np.cumsum(np.nan_to_num(values), axis=1)
+    counts = np.cumsum(~np.isnan(values), axis=1)
+    sums[:, window:] -= sums[:, :-window].copy()
+    counts[:, window:] -= counts[:, :-window].copy()
+    out = np.full(values.shape, np.nan)
+    np.divide(sums, counts, out=out, where=counts > 0)
+    return out
+
+
+def cumulative(values: np.ndarray) -> np.ndarray:
+    """Running total along axis 1, skipping gaps; NaN before the first report."""
+    out = np.cumsum(np.nan_to_num(values), axis=1)
+    out[np.cumsum(~np.isnan(values), axis=1) == 0] = np.nan
+    return out
+
+
+def _like_for_like(values: np.ndarray, lag: int) -> np.ndarray:
+    """(quarter, metric) growth of the summed values of companies reported at both ends."""
+    out = np.full(values.shape[1:], np.nan)
+    if values.shape[1] > lag:
+        cur, prev = values[:, lag:], values[:, :-lag]
+        both = ~np.isnan(cur) & ~np.isnan(prev)
+        cur_total = np.where(both, cur, 0).sum(axis=0)
+        prev_total = np.where(both, prev, 0).sum(axis=0)
+        np.divide(cur_total - prev_total, np.abs(prev_total), out=out[lag:],
+                  where=both.any(axis=0) & (prev_total != 0))
+    return out
+
+
+@dataclass(frozen=True)
+class TimeSeriesCube:
+    store: MetricStore
+    portfolio: dict[str, np.ndarray]  # kind -> (quarter, metric)
+    # (kind, metric) -> (company, quarter), filled on first use
+    _company: dict[tuple[str, str], np.ndarray] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_store(cls, store: MetricStore) -> "TimeSeriesCube":
+        values = store.values
+        # Totals and means are over each company's latest snapshot as of every
+        # quarter, so they match the headline aggregates and the rollups
+        asof = store.asof
+        latest = values[np.arange(len(store))[:, None], np.maximum(asof, 0)]
+        latest[asof < 0] = np.nan
+        counts = (~np.isnan(latest)).sum(axis=0)
+        total = np.where(counts > 0, np.nansum(latest, axis=0), np.nan)
+        mean = np.full(total.shape, np.nan)
+        np.divide(total, counts, out=mean, where=counts > 0)
+        portfolio = {
+            "total": total,
+            "mean": mean,
+            "count": counts,
+            "qoq": _like_for_like(values, 1),
+            "yoy": _like_for_like(values, YOY_LAG),
+            "rolling": rolling_mean(total[None], ROLLING_WINDOW)[0],
+            "cumulative": cumulative(total[None])[0],
+        }
+        for arr in portfolio.values():
+            arr.flags.writeable = False
+        return cls(store, portfolio)
+
+    def company(self, metric: str, kind: str = "value") -> np.ndarray:
+        """Every company's ``kind`` series of one metric, as a (company, quarter) array."""
+        key = (kind, metric)
+        arr = self._company.get(key)
+        if arr is None:
+            values = self.store.values[:, :, METRIC_INDEX[metric]]
+            if kind == "value":
+                arr = values
+            elif kind == "qoq":
+                arr = growth(values, 1)
+            elif kind == "yoy":
+                arr = growth(values, YOY_LAG)
+            elif kind == "rolling":
+                arr = rolling_mean(values, ROLLING_WINDOW)
+            elif kind == "cumulative":
+                arr = cumulative(values)
+            else:
+                raise ValueError(f"Unknown series kind {kind!r}; expected one of {COMPANY_KINDS}")
+            arr.flags.writeable = False
+            # Concurrent sessions may both compute it; either result is the same
+            self._company[key] = arr
+        return arr
+
+    def series(self, key: int | str, metric: str, kind: str = "value", as_of: str | None = None) -> np.ndarray:
+        """One company's series over the quarter axis, up to and including ``as_of``."""
+        end = self.store.quarter_position(as_of) + 1
+        return self.company(metric, kind)[self.store.position(key), :end]
+
+    def portfolio_series(self, metric: str, kind: str = "total", as_of: str | None = None) -> np.ndarray:
+        """Portfolio series over the quarter axis, up to and including ``as_of``."""
+        end = self.store.quarter_position(as_of) + 1
+        return self.portfolio[kind][:end, METRIC_INDEX[metric]]
+
+    def latest(self, metric: str, kind: str, as_of: str | None = None) -> np.ndarray:
+        """Per company, ``kind`` at its latest snapshot as of a quarter (NaN if none)."""
+        idx = self.store.as_of_idx(as_of)
+        out = self.company(metric, kind)[np.arange(len(self.store)), np.maximum(idx, 0)]
+        return np.where(idx >= 0, out, np.nan)
+
+
+def chart_values(series: np.ndarray) -> list[float | None]:
+    """A series as a list for line charts, with gaps as None so lines break instead of dropping to 0."""
+    return [None if v != v else v for v in series.tolist()]
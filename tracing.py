@@ -0,0 +1,134 @@
+"""Opt-in timing spans for page runs, chart builds, data access and widgets.
+
+Spans are recorded only while tracing is enabled (DASHBOARD_TRACING=1, or the
+toggle on the diagnostics page) and kept in a process-wide ring buffer of the
+most recent TRACE_BUFFER_SIZE spans. When disabled, ``span`` and ``traced``
+cost one flag check. The buffer exports to the Chrome trace event format,
+which chrome://tracing, Perfetto and speedscope all open.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import TRACE_BUFFER_SIZE, TRACING
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    category: str  # page, data, kpi, chart, widget
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    depth: int     # nesting level within its thread
+
+
+_enabled = TRACING
+_spans: deque[Span] = deque(maxlen=TRACE_BUFFER_SIZE)
+_local = threading.local()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(on: bool) -> None:
+    """Turn span recording on or off for the whole process."""
+    global _enabled
+    _enabled = on
+
+
+@contextmanager
+def span(name: str, category: str):
+    """Record the enclosed block as a span while tracing is enabled."""
+    if not _enabled:
+        yield
+        return
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        _spans.append(Span(name, category, start, time.perf_counter_ns() - start,
+                           threading.get_ident(), depth))
+
+
+def traced(category: str, name: str | None = None) -> Callable:
+    """Decorator recording each call of a function as a span."""
+    def decorator(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with span(label, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def spans() -> list[Span]:
+    """Snapshot of the ring buffer, oldest first."""
+    return list(_spans)
+
+
+def clear() -> None:
+    _spans.clear()
+
+
+def summarize(recorded: list[Span]) -> list[dict]:
+    """Per span name: call count and total, mean and max milliseconds, slowest first."""
+    by_name: dict[tuple[str, str], list[int]] = {}
+    for s in recorded:
+        by_name.setdefault((s.category, s.name), []).append(s.duration_ns)
+    rows = [
+        {
+            "category": category,
+            "span": name,
+            "calls": len(durations),
+            "total (ms)": round(sum(durations) / 1e6, 2),
+            "mean (ms)": round(sum(durations) / len(durations) / 1e6, 2),
+            "max (ms)": round(max(durations) / 1e6, 2),
+        }
+        for (category, name), durations in by_name.items()
+    ]
+    return sorted(rows, key=lambda r: r["total (ms)"], reverse=True)
+
+
+def chrome_trace(recorded: list[Span]) -> dict:
+    """Spans as Chrome trace "complete" events (microsecond timestamps)."""
+    pid = os.getpid()
+    return {
+        "traceEvents": [
+            {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": s.start_ns / 1000,
+                "dur": s.duration_ns / 1000,
+                "pid": pid,
+                "tid": s.thread_id,
+            }
+            for s in recorded
+        ],
+        "displayTimeUnit": "ms",
+    }
+
+
+def write_trace(path: Path | str) -> None:
+    """Write the current buffer as a Chrome trace file, replacing it atomically."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(chrome_trace(spans())), encoding="utf-8")
+    os.replace(tmp, path)